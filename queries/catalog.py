@@ -0,0 +1,189 @@
+"""Shared-memory table catalog for the query processes of a suite run.
+
+With io_type ``shm``, `execute_all` serves a catalog while the query processes
+run. The first process that asks for a table has the catalog load it once into
+POSIX shared memory as an uncompressed Arrow IPC file. Every later process maps
+the same segment and reads the table without copying or decoding it.
+"""
+
+from __future__ import annotations
+
+import atexit
+import os
+import secrets
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from functools import cache
+from multiprocessing.managers import BaseManager
+from multiprocessing.shared_memory import SharedMemory
+from pathlib import Path
+from typing import TYPE_CHECKING, Any
+
+from settings import Settings
+
+if TYPE_CHECKING:
+    from collections.abc import Iterator
+
+    import pyarrow as pa
+
+settings = Settings()
+
+# Passed on to the query processes so they can connect to the catalog
+_ADDRESS_ENV = "TPCH_CATALOG_ADDRESS"
+_AUTHKEY_ENV = "TPCH_CATALOG_AUTHKEY"
+
+# Where Linux exposes POSIX shared memory segments as files
+_SHM_DIR = Path("/dev/shm")
+
+
+class _CatalogManager(BaseManager):
+    pass
+
+
+class TableCatalog:
+    """Tables loaded into shared memory, evicted least recently used first.
+
+    Parameters
+    ----------
+    memory_limit
+        Budget of all segments together in bytes, unlimited if None. Tables that
+        are still referenced by a query process are never evicted, so the budget
+        can be exceeded while they are in use.
+    """
+
+    def __init__(self, memory_limit: int | None) -> None:
+        self.memory_limit = memory_limit
+        # Ordered from least to most recently used
+        self._segments: OrderedDict[str, SharedMemory] = OrderedDict()
+        self._refcounts: dict[str, int] = {}
+        self._lock = threading.Lock()
+        self.stats = {"loads": 0, "hits": 0, "evictions": 0}
+
+    def acquire(self, table_name: str) -> str:
+        """Load the table if needed and return the name of its segment."""
+        with self._lock:
+            if table_name in self._segments:
+                self._segments.move_to_end(table_name)
+                self.stats["hits"] += 1
+            else:
+                self._segments[table_name] = self._load(table_name)
+                self.stats["loads"] += 1
+
+            self._refcounts[table_name] = self._refcounts.get(table_name, 0) + 1
+            return self._segments[table_name].name
+
+    def release(self, table_name: str) -> None:
+        """Drop a reference to the table, after which it may be evicted."""
+        with self._lock:
+            self._refcounts[table_name] -= 1
+
+    def get_stats(self) -> dict[str, int]:
+        with self._lock:
+            return {
+                **self.stats,
+                "resident[bytes]": sum(s.size for s in self._segments.values()),
+            }
+
+    def close(self) -> None:
+        """Remove all segments."""
+        with self._lock:
+            while self._segments:
+                _, segment = self._segments.popitem()
+                segment.close()
+                segment.unlink()
+
+    def _load(self, table_name: str) -> SharedMemory:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        table = pq.read_table(settings.dataset_base_dir / f"{table_name}.parquet")
+
+        # Measure the IPC file first, a segment cannot grow after it is created
+        sink = pa.MockOutputStream()
+        with pa.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+        size = sink.size()
+
+        self._evict(size)
+        segment = SharedMemory(create=True, size=size)
+        stream = pa.FixedSizeBufferWriter(pa.py_buffer(segment.buf))
+        with pa.ipc.new_file(stream, table.schema) as writer:
+            writer.write_table(table)
+        # Release the exported buffer, else the segment cannot be closed later
+        del stream
+        return segment
+
+    def _evict(self, size: int) -> None:
+        if self.memory_limit is None:
+            return
+
+        used = sum(s.size for s in self._segments.values())
+        for table_name in list(self._segments):
+            if used + size <= self.memory_limit:
+                break
+            if self._refcounts.get(table_name, 0) > 0:
+                continue
+            segment = self._segments.pop(table_name)
+            used -= segment.size
+            segment.close()
+            segment.unlink()
+            self.stats["evictions"] += 1
+
+
+@contextmanager
+def serve_catalog() -> Iterator[TableCatalog]:
+    """Serve a table catalog to the query processes started within the context."""
+    catalog = TableCatalog(settings.run.catalog_memory_limit)
+    authkey = secrets.token_bytes(16)
+
+    _CatalogManager.register("catalog", callable=lambda: catalog)
+    manager = _CatalogManager(address=("127.0.0.1", 0), authkey=authkey)
+    server = manager.get_server()
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    host, port = server.address  # type: ignore[misc,str-unpack]
+    os.environ[_ADDRESS_ENV] = f"{host}:{port}"
+    os.environ[_AUTHKEY_ENV] = authkey.hex()
+    try:
+        yield catalog
+    finally:
+        del os.environ[_ADDRESS_ENV], os.environ[_AUTHKEY_ENV]
+        print(f"Table catalog: {catalog.get_stats()}")
+        catalog.close()
+
+
+@cache
+def _connect() -> Any:
+    """Return a proxy of the catalog served by the parent process, if any."""
+    address = os.environ.get(_ADDRESS_ENV)
+    if address is None:
+        return None
+
+    host, port = address.rsplit(":", 1)
+    _CatalogManager.register("catalog")
+    manager = _CatalogManager(
+        address=(host, int(port)), authkey=bytes.fromhex(os.environ[_AUTHKEY_ENV])
+    )
+    manager.connect()
+    return manager.catalog()  # type: ignore[attr-defined]
+
+
+def read_catalog_table(table_name: str) -> pa.Table:
+    """Read the table from the shared-memory catalog without copying it.
+
+    A query that runs on its own, outside of `execute_all`, has no catalog to
+    share tables with and reads the Parquet table instead.
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    catalog = _connect()
+    if catalog is None:
+        return pq.read_table(settings.dataset_base_dir / f"{table_name}.parquet")
+
+    segment_name = catalog.acquire(table_name)
+    atexit.register(catalog.release, table_name)
+
+    source = pa.memory_map(str(_SHM_DIR / segment_name))
+    return pa.ipc.open_file(source).read_all()
@@ -0,0 +1,433 @@
+"""Collectors of metrics about the queries, beyond their duration.
+
+Each collector is a context manager around the timed block of a query. Entering
+returns a dictionary, which is filled in with the metrics of the block on exit
+and logged by `run_query_generic` together with the timings.
+"""
+
+from __future__ import annotations
+
+import ctypes
+import errno
+import fcntl
+import itertools
+import os
+import platform
+import signal
+import struct
+import sys
+import threading
+import time
+from subprocess import PIPE, STDOUT, Popen
+from typing import TYPE_CHECKING, Literal
+
+import psutil
+
+from queries.common_utils import get_mmap_table_path, get_table_bytes, get_table_rows
+from settings import Settings
+
+if TYPE_CHECKING:
+    from pathlib import Path
+    from types import TracebackType
+
+settings = Settings()
+
+
+class CpuSampler:
+    """Sample the CPU usage of this process and all its children in the background.
+
+    Entering the sampler returns a dictionary, which is filled in with the CPU
+    metrics on exit. The cores in use are sampled every `interval` seconds into
+    `samples`, as pairs of the time since entering and the number of cores. The
+    peak of the summed resident memory of the processes is tracked as well.
+
+    Child processes, such as Spark JVMs or Dask workers, are included. The CPU time
+    of child processes that exit between two samples is lost. Operating systems
+    account CPU time in clock ticks, typically of 10 ms, so short intervals give
+    coarse samples.
+    """
+
+    # A process using fewer cores than this is considered to run serially
+    serial_threshold = 1.5
+
+    def __init__(self, interval: float) -> None:
+        self.interval = interval
+        self.samples: list[tuple[float, float]] = []
+        self.metrics: dict[str, float] = {}
+
+        self._process = psutil.Process()
+        self._start: dict[int, tuple[float, float]] = {}
+        self._last: dict[int, tuple[float, float]] = {}
+        self._peak_memory = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._sample, daemon=True)
+
+    def _cpu_times(self) -> tuple[float, float]:
+        """Return the user and system CPU time of the process tree since entering."""
+        try:
+            processes = [self._process, *self._process.children(recursive=True)]
+        except psutil.Error:
+            processes = [self._process]
+
+        memory = 0
+        for process in processes:
+            try:
+                with process.oneshot():
+                    times = process.cpu_times()
+                    memory += process.memory_info().rss
+            except psutil.Error:
+                continue
+            self._last[process.pid] = (times.user, times.system)
+        self._peak_memory = max(self._peak_memory, memory)
+
+        user = sum(
+            u - self._start.get(pid, (0, 0))[0] for pid, (u, _) in self._last.items()
+        )
+        system = sum(
+            s - self._start.get(pid, (0, 0))[1] for pid, (_, s) in self._last.items()
+        )
+        return user, system
+
+    def _sample(self) -> None:
+        last_time, last_cpu = self._start_time, 0.0
+        while not self._stop.wait(self.interval):
+            now = time.perf_counter()
+            cpu = sum(self._cpu_times())
+            self.samples.append(
+                (now - self._start_time, (cpu - last_cpu) / (now - last_time))
+            )
+            last_time, last_cpu = now, cpu
+
+    def __enter__(self) -> dict[str, float]:
+        self._cpu_times()
+        self._start = dict(self._last)
+        self._start_time = time.perf_counter()
+        self._thread.start()
+        return self.metrics
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc_value: BaseException | None,
+        traceback: TracebackType | None,
+    ) -> None:
+        self._stop.set()
+        self._thread.join()
+        wall = time.perf_counter() - self._start_time
+        user, system = self._cpu_times()
+
+        serial = [c for _, c in self.samples if c < self.serial_threshold]
+        self.metrics["cpu_user[s]"] = user
+        self.metrics["cpu_system[s]"] = system
+        self.metrics["effective_parallelism"] = (user + system) / wall
+        self.metrics["peak_cores"] = max((c for _, c in self.samples), default=0.0)
+        self.metrics["serial_fraction"] = (
+            len(serial) / len(self.samples) if self.samples else 0.0
+        )
+        self.metrics["peak_memory[bytes]"] = self._peak_memory
+
+
+class SamplingProfiler:
+    """Record the stacks of this process and its children with py-spy.
+
+    Python frames and native frames, such as those of Arrow kernels or allocators,
+    are sampled `rate` times per second. py-spy is attached when entering and has
+    started sampling before the block runs. On exit it writes the profile to
+    `path` in `output_format`: an interactive SVG for ``flamegraph``, or a file to
+    open in https://www.speedscope.app for ``speedscope``. Entering returns an
+    empty dictionary, as the profile has no metrics to log.
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        rate: int,
+        output_format: Literal["flamegraph", "speedscope"],
+    ) -> None:
+        self.path = path
+        self.rate = rate
+        self.output_format = output_format
+
+    def __enter__(self) -> dict[str, float]:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        # py-spy writes the profile when it is interrupted
+        self._process = Popen(
+            [
+                "py-spy",
+                "record",
+                f"--pid={os.getpid()}",
+                f"--rate={self.rate}",
+                f"--format={self.output_format}",
+                f"--output={self.path}",
+                "--native",
+                "--subprocesses",
+            ],
+            stdout=PIPE,
+            stderr=STDOUT,
+            text=True,
+        )
+        self._output: list[str] = []
+        self._attached = threading.Event()
+        # Keep draining the output, py-spy blocks the sampled process on a full pipe
+        self._reader = threading.Thread(target=self._read, daemon=True)
+        self._reader.start()
+
+        # Wait until py-spy is attached, else the start of the block is missed
+        while not self._attached.wait(0.01):
+            if self._process.poll() is not None:
+                self._reader.join()
+                msg = f"py-spy failed to attach to process {os.getpid()}:\n"
+                raise RuntimeError(msg + "".join(self._output))
+        return {}
+
+    def _read(self) -> None:
+        assert self._process.stdout is not None
+        for line in self._process.stdout:
+            self._output.append(line)
+            if line.startswith("py-spy> Sampling process"):
+                self._attached.set()
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc_value: BaseException | None,
+        traceback: TracebackType | None,
+    ) -> None:
+        self._process.send_signal(signal.SIGINT)
+        self._process.wait()
+        self._reader.join()
+        # Blocks too short to be sampled leave nothing to write, which is no reason
+        # to fail the query
+        if self._process.returncode != 0:
+            print(f"py-spy failed to write {self.path}:\n{''.join(self._output)}")
+
+
+# (type, config) of each counted event, see linux/perf_event.h
+PERF_EVENTS = {
+    "cycles": (0, 0),
+    "instructions": (0, 1),
+    "llc_misses": (0, 3),
+    "branch_misses": (0, 5),
+    "context_switches": (1, 3),
+    "page_faults": (1, 2),
+}
+
+# Number of the perf_event_open syscall per architecture
+PERF_EVENT_OPEN_SYSCALLS = {"x86_64": 298, "aarch64": 241}
+
+
+class _PerfEventAttr(ctypes.Structure):
+    """The leading fields of `struct perf_event_attr`, see perf_event_open(2)."""
+
+    _fields_ = (
+        ("type", ctypes.c_uint32),
+        ("size", ctypes.c_uint32),
+        ("config", ctypes.c_uint64),
+        ("sample_period", ctypes.c_uint64),
+        ("sample_type", ctypes.c_uint64),
+        ("read_format", ctypes.c_uint64),
+        ("flags", ctypes.c_uint64),
+        ("wakeup_events", ctypes.c_uint32),
+        ("bp_type", ctypes.c_uint32),
+        ("config1", ctypes.c_uint64),
+        ("config2", ctypes.c_uint64),
+    )
+
+
+class PerfCounters:
+    """Count hardware and software events of this process and its children.
+
+    The events are counted through perf_event_open(2) for every thread of the
+    process tree while the block runs. Entering returns a dictionary, which is
+    filled in with the event counts on exit, together with the instructions per
+    cycle and the misses per row of the tables read by the query.
+
+    Events the kernel or hardware does not support, as in most virtual machines,
+    or that `perf_event_paranoid` forbids are left out. Kernel events are excluded
+    if only user space events may be counted. Threads that are started and still
+    running within the block are not counted, as their counts are only added to
+    their parent thread when they exit. On architectures other than x86-64 and
+    aarch64 no events are counted.
+    """
+
+    _ioc_enable = 0x2400
+    _ioc_disable = 0x2401
+    # Bits of `perf_event_attr.flags`
+    _disabled, _inherit, _exclude_kernel, _exclude_hv = 1, 2, 1 << 5, 1 << 6
+    # Read the time the counter was enabled and running, to scale multiplexed counts
+    _read_format = 1 | 2
+
+    def __init__(self) -> None:
+        self.metrics: dict[str, float] = {}
+        self._libc = ctypes.CDLL(None, use_errno=True)
+        self._fds: dict[str, list[int]] = {}
+        self._syscall_number = PERF_EVENT_OPEN_SYSCALLS.get(platform.machine())
+
+    def _open(self, event: str, tid: int) -> int:
+        assert self._syscall_number is not None
+        type_, config = PERF_EVENTS[event]
+        attr = _PerfEventAttr(
+            type=type_,
+            size=ctypes.sizeof(_PerfEventAttr),
+            config=config,
+            read_format=self._read_format,
+            flags=self._disabled | self._inherit | self._exclude_hv,
+        )
+        fd: int = self._libc.syscall(
+            self._syscall_number, ctypes.byref(attr), tid, -1, -1, 0
+        )
+        if fd < 0 and ctypes.get_errno() == errno.EACCES:
+            # Unprivileged users may only count events in user space
+            attr.flags |= self._exclude_kernel
+            fd = self._libc.syscall(
+                self._syscall_number, ctypes.byref(attr), tid, -1, -1, 0
+            )
+        return fd
+
+    def _threads(self) -> list[int]:
+        try:
+            processes = [psutil.Process(), *psutil.Process().children(recursive=True)]
+        except psutil.Error:
+            processes = [psutil.Process()]
+
+        threads: list[int] = []
+        for process in processes:
+            try:
+                threads.extend(t.id for t in process.threads())
+            except psutil.Error:
+                continue
+        return threads
+
+    def __enter__(self) -> dict[str, float]:
+        if sys.platform != "linux" or self._syscall_number is None:
+            machine = f"{sys.platform} {platform.machine()}"
+            print(f"Performance counters are not supported on {machine}")
+            return self.metrics
+
+        threads = self._threads()
+        for event in PERF_EVENTS:
+            fds = [fd for tid in threads if (fd := self._open(event, tid)) >= 0]
+            if fds:
+                self._fds[event] = fds
+            else:
+                reason = os.strerror(ctypes.get_errno())
+                print(f"Performance counter {event!r} is unavailable: {reason}")
+
+        for fd in itertools.chain.from_iterable(self._fds.values()):
+            fcntl.ioctl(fd, self._ioc_enable, 0)
+        return self.metrics
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc_value: BaseException | None,
+        traceback: TracebackType | None,
+    ) -> None:
+        for fd in itertools.chain.from_iterable(self._fds.values()):
+            fcntl.ioctl(fd, self._ioc_disable, 0)
+
+        for event, fds in self._fds.items():
+            count = 0.0
+            for fd in fds:
+                value, enabled, running = struct.unpack("QQQ", os.read(fd, 24))
+                os.close(fd)
+                # Counters that share the hardware with others only run part time
+                count += value * enabled / running if running else 0.0
+            self.metrics[event] = count
+        self._fds.clear()
+
+        if self.metrics.get("cycles"):
+            self.metrics["ipc"] = (
+                self.metrics.get("instructions", 0.0) / self.metrics["cycles"]
+            )
+        rows = get_table_rows()
+        if rows:
+            for event in ("llc_misses", "branch_misses"):
+                if event in self.metrics:
+                    self.metrics[f"{event}_per_table_row"] = self.metrics[event] / rows
+
+
+class DiskIoCounter:
+    """Count the bytes this process and its children read while a block runs.
+
+    Entering evicts the table files and the DuckDB database file from the page
+    cache, so every byte of them the block needs is read from storage again, and
+    the timings are logged as cold runs. On
+    exit the dictionary returned by entering is filled in with the bytes read from
+    storage, the bytes passed through read calls, and the size of the table files
+    read by the query. Their ratio is the I/O amplification: near 1 for a scan
+    that reads whole files, far below 1 for a scan that only reads the columns and
+    row groups it needs. A DuckDB database file holds all tables, so no
+    amplification is given for it.
+
+    Memory-mapped reads only show up in the bytes read from storage, not in those
+    passed through read calls. I/O of child processes that exit within the block
+    is lost.
+    """
+
+    def __init__(self) -> None:
+        self.metrics: dict[str, float] = {}
+        self._process = psutil.Process()
+        self._start: dict[int, tuple[int, int]] = {}
+
+    def _io_counters(self) -> dict[int, tuple[int, int]]:
+        try:
+            processes = [self._process, *self._process.children(recursive=True)]
+        except psutil.Error:
+            processes = [self._process]
+
+        counters = {}
+        for process in processes:
+            try:
+                io = process.io_counters()
+            except psutil.Error:
+                continue
+            counters[process.pid] = (io.read_bytes, io.read_chars)
+        return counters
+
+    def __enter__(self) -> dict[str, float]:
+        if settings.run.io_type == "mmap":
+            paths = [
+                get_mmap_table_path(p.stem)
+                for p in settings.dataset_base_dir.glob("*.parquet")
+            ]
+        else:
+            ext = settings.run.io_type if settings.run.include_io else "parquet"
+            paths = list(settings.dataset_base_dir.rglob(f"*.{ext}"))
+        if settings.run.duckdb_persistent and settings.duckdb_database_path.exists():
+            paths.append(settings.duckdb_database_path)
+
+        for path in paths:
+            fd = os.open(path, os.O_RDONLY)
+            try:
+                os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_DONTNEED)
+            finally:
+                os.close(fd)
+
+        self._start = self._io_counters()
+        return self.metrics
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc_value: BaseException | None,
+        traceback: TracebackType | None,
+    ) -> None:
+        deltas = [
+            (b - self._start.get(pid, (0, 0))[0], c - self._start.get(pid, (0, 0))[1])
+            for pid, (b, c) in self._io_counters().items()
+        ]
+        read_bytes = sum(b for b, _ in deltas)
+        self.metrics["read_bytes"] = read_bytes
+        self.metrics["read_chars"] = sum(c for _, c in deltas)
+
+        # Tables read in memory before the query have no I/O to amplify
+        if (
+            settings.run.io_type not in ("parquet", "csv", "feather")
+            or settings.run.duckdb_persistent
+        ):
+            return
+        table_bytes = get_table_bytes()
+        if table_bytes:
+            self.metrics["table_bytes"] = table_bytes
+            self.metrics["io_amplification"] = read_bytes / table_bytes
@@ -1,4 +1,16 @@
+import os
+
 from queries.common_utils import execute_all
+from queries.dask.utils import create_local_cluster
+from settings import Settings
+
+settings = Settings()
 
 if __name__ == "__main__":
-    execute_all("dask")
+    if settings.run.dask_scheduler == "distributed":
+        # Share a single cluster between the query processes
+        with create_local_cluster() as cluster:
+            os.environ["DASK_SCHEDULER_ADDRESS"] = cluster.scheduler_address
+            execute_all("dask")
+    else:
+        execute_all("dask")
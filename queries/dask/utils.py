@@ -1,5 +1,7 @@
 from __future__ import annotations
 
+from contextlib import contextmanager
+from functools import partial
 from typing import TYPE_CHECKING, Any
 
 import dask
@@ -14,13 +16,17 @@ from queries.common_utils import (
 from settings import Settings
 
 if TYPE_CHECKING:
-    from collections.abc import Callable
+    from collections.abc import Callable, Iterator
 
     from dask.dataframe import DataFrame
+    from distributed import Client, LocalCluster, Worker
 
 settings = Settings()
 
-dask.config.set(scheduler="threads")
+if settings.run.dask_scheduler != "distributed":
+    dask.config.set(
+        scheduler=settings.run.dask_scheduler, num_workers=settings.run.dask_n_workers
+    )
 
 
 def read_ds(table_name: str) -> DataFrame:
@@ -87,5 +93,80 @@ def get_part_supp_ds() -> DataFrame:
     return read_ds("partsupp")
 
 
+def create_local_cluster() -> LocalCluster:
+    from distributed import LocalCluster
+
+    return LocalCluster(  # type: ignore[no-untyped-call]
+        n_workers=settings.run.dask_n_workers,
+        threads_per_worker=settings.run.dask_threads_per_worker,
+        memory_limit=settings.run.dask_memory_limit,
+        local_directory=settings.run.dask_local_directory,
+    )
+
+
+def _get_client() -> Client:
+    from distributed import Client
+
+    # Connect to the cluster shared by all query processes if there is one
+    if dask.config.get("scheduler-address", None) is not None:
+        return Client()  # type: ignore[no-untyped-call]
+    return Client(create_local_cluster())  # type: ignore[no-untyped-call]
+
+
+def _worker_spill_metrics(dask_worker: Worker) -> dict[str, float]:
+    # Ever-increasing counters, only present if the worker can spill to disk
+    cumulative_metrics = getattr(dask_worker.data, "cumulative_metrics", {})
+    return {
+        f"spill_{label}[{unit}]": cumulative_metrics.get((label, unit), 0)
+        for label in ("disk-write", "disk-read")
+        for unit in ("count", "bytes", "seconds")
+    }
+
+
+def _spill_metrics(client: Client) -> dict[str, float]:
+    totals: dict[str, float] = {}
+    for worker_metrics in client.run(_worker_spill_metrics).values():
+        for metric, value in worker_metrics.items():
+            totals[metric] = totals.get(metric, 0) + value
+    return totals
+
+
+@contextmanager
+def _collect_distributed_metrics(client: Client) -> Iterator[dict[str, float]]:
+    from distributed import get_task_stream
+
+    metrics: dict[str, float] = {}
+    spill_before = _spill_metrics(client)
+
+    with get_task_stream(client) as ts:  # type: ignore[no-untyped-call]
+        yield metrics
+
+    metrics["n_tasks"] = len(ts.data)
+    startstops = [ss for task in ts.data for ss in task["startstops"]]
+    for action in ("compute", "transfer", "disk-read", "disk-write"):
+        metrics[f"task_{action}[s]"] = sum(
+            ss["stop"] - ss["start"] for ss in startstops if ss["action"] == action
+        )
+
+    for metric, value in _spill_metrics(client).items():
+        metrics[metric] = value - spill_before.get(metric, 0)
+
+
 def run_query(query_number: int, query: Callable[..., Any]) -> None:
-    run_query_generic(query, query_number, "dask", query_checker=check_query_result_pd)
+    scheduler = settings.run.dask_scheduler
+    library_name = "dask" if scheduler == "threads" else f"dask-{scheduler}"
+
+    metrics_collectors = []
+    if scheduler == "distributed":
+        # Start or connect to the cluster before any timings are taken
+        client = _get_client()
+        metrics_collectors.append(partial(_collect_distributed_metrics, client))
+
+    run_query_generic(
+        query,
+        query_number,
+        library_name,
+        library_version=dask.__version__,
+        query_checker=check_query_result_pd,
+        metrics_collectors=metrics_collectors,
+    )
@@ -1,25 +1,177 @@
+import json
+import shutil
+import tempfile
+import time
+from pathlib import Path
+from typing import Any
+
 import duckdb
-from duckdb import DuckDBPyRelation
+from duckdb import DuckDBPyConnection, DuckDBPyRelation
 
+from queries.catalog import read_catalog_table
 from queries.common_utils import (
     check_query_result_pl,
+    get_manifest_hash,
     get_table_path,
+    log_query_metrics,
+    log_query_operators,
+    read_mmap_table,
     run_query_generic,
 )
 from settings import Settings
 
 settings = Settings()
 
+TABLE_NAMES = [
+    "customer",
+    "lineitem",
+    "nation",
+    "orders",
+    "part",
+    "partsupp",
+    "region",
+    "supplier",
+]
+
+
+# Time spent handing in-memory Polars or Arrow tables over to DuckDB, per table
+_handoff_seconds: dict[str, float] = {}
+# Time spent loading Parquet tables into DuckDB temp tables, per table
+_native_load_seconds: dict[str, float] = {}
+
+
+def _get_config() -> dict[str, str]:
+    config = {}
+    if settings.run.duckdb_threads is not None:
+        config["threads"] = str(settings.run.duckdb_threads)
+    if settings.run.duckdb_memory_limit is not None:
+        config["memory_limit"] = settings.run.duckdb_memory_limit
+    if settings.run.duckdb_temp_directory is not None:
+        config["temp_directory"] = str(settings.run.duckdb_temp_directory)
+    return config
+
+
+def _register_feather(
+    con: DuckDBPyConnection, table_name: str, *, record: bool = True
+) -> str:
+    import pyarrow.dataset as ds
+
+    # DuckDB cannot read Arrow IPC files itself, so scan them through Arrow.
+    # Projections and filters are still pushed down into the dataset scan.
+    name = f"{table_name}_feather"
+    path = get_table_path(table_name, record=record)
+    con.register(name, ds.dataset(path, format="feather"))
+    return name
+
+
+def _load_native(name: str, path: str) -> None:
+    """Load a Parquet table into a native DuckDB temp table."""
+    start = time.perf_counter()
+    duckdb.sql(f"create temp table {name} as select * from read_parquet('{path}');")
+    _native_load_seconds[name] = time.perf_counter() - start
+
+
+def _register_in_memory(name: str, table_name: str) -> None:
+    """Expose an in-memory Polars DataFrame or Arrow table to DuckDB without copying.
+
+    The native load of the same table is timed as well, so that both ways of
+    getting the table into DuckDB are reported side by side.
+    """
+    path = get_table_path(table_name)
+    if settings.run.duckdb_in_memory_source == "polars":
+        import polars as pl
+
+        df = pl.read_parquet(path, rechunk=True)
+    else:
+        import pyarrow.parquet as pq
+
+        df = pq.read_table(path)
+
+    # The first registration imports and initializes the Arrow conversion
+    duckdb.register(f"{name}_warmup", df)
+    duckdb.unregister(f"{name}_warmup")
+
+    start = time.perf_counter()
+    # DuckDB scans the data through the Arrow C data interface
+    duckdb.register(name, df)
+    _handoff_seconds[name] = time.perf_counter() - start
+
+    # Only the load time is kept, the query runs on the registered table
+    _load_native(f"{name}_native", str(path))
+    duckdb.sql(f"drop table {name}_native;")
+    _native_load_seconds[name] = _native_load_seconds.pop(f"{name}_native")
+
+
+def _create_database(manifest_hash: str) -> None:
+    """Load all tables into a native DuckDB database file.
+
+    The hash of the data tables is stored in the database, so that it is created
+    again when the tables are regenerated.
+    """
+    path = settings.duckdb_database_path
+    tmp_path = path.with_suffix(".tmp")
+    tmp_path.unlink(missing_ok=True)
+
+    print(f"Creating DuckDB database {path}")
+    with duckdb.connect(tmp_path, config=_get_config()) as con:
+        for table_name in TABLE_NAMES:
+            # No query reads the tables yet, they are only loaded
+            if settings.run.io_type == "feather":
+                source = _register_feather(con, table_name, record=False)
+            else:
+                source = f"'{get_table_path(table_name, record=False)}'"
+            con.execute(f"create table {table_name} as select * from {source}")
+        con.execute(
+            "create table manifest as select ? as manifest_hash", [manifest_hash]
+        )
+
+    tmp_path.rename(path)
+
+
+def _get_database_hash() -> str | None:
+    """Return the hash of the data tables the database was created from, if any."""
+    path = settings.duckdb_database_path
+    if not path.exists():
+        return None
+
+    with duckdb.connect(path, read_only=True) as con:
+        try:
+            row = con.execute("select manifest_hash from manifest").fetchone()
+        except duckdb.CatalogException:
+            return None
+    return None if row is None else str(row[0])
+
+
+def _connect() -> DuckDBPyConnection:
+    if not settings.run.duckdb_persistent:
+        return duckdb.connect(config=_get_config())
+
+    manifest_hash = get_manifest_hash()
+    if _get_database_hash() != manifest_hash:
+        _create_database(manifest_hash)
+    return duckdb.connect(
+        settings.duckdb_database_path, read_only=True, config=_get_config()
+    )
+
+
+# The queries use the module-level `duckdb.sql`, which runs on this connection
+duckdb.set_default_connection(_connect())
+
 
 def _scan_ds(table_name: str) -> str:
+    if settings.run.duckdb_persistent:
+        return table_name
+
     path = get_table_path(table_name)
     path_str = str(path)
 
     if settings.run.io_type == "skip":
         name = path_str.replace("/", "_").replace(".", "_").replace("-", "_")
-        duckdb.sql(
-            f"create temp table if not exists {name} as select * from read_parquet('{path_str}');"
-        )
+        if name not in _native_load_seconds:
+            if settings.run.duckdb_in_memory_source == "duckdb":
+                _load_native(name, path_str)
+            else:
+                _register_in_memory(name, table_name)
         return name
     elif settings.run.io_type == "parquet":
         duckdb.read_parquet(path_str)
@@ -27,6 +179,16 @@ def _scan_ds(table_name: str) -> str:
     elif settings.run.io_type == "csv":
         duckdb.read_csv(path_str)
         return f"'{path_str}'"
+    elif settings.run.io_type == "feather":
+        return _register_feather(duckdb.default_connection(), table_name)
+    elif settings.run.io_type == "mmap":
+        name = f"{table_name}_mmap"
+        duckdb.register(name, read_mmap_table(table_name))
+        return name
+    elif settings.run.io_type == "shm":
+        name = f"{table_name}_shm"
+        duckdb.register(name, read_catalog_table(table_name))
+        return name
     else:
         msg = f"unsupported file type: {settings.run.io_type!r}"
         raise ValueError(msg)
@@ -64,8 +226,85 @@ def get_part_supp_ds() -> str:
     return _scan_ds("partsupp")
 
 
+def _enable_profiling() -> Path:
+    """Write the JSON profile of every following query to a temporary file."""
+    path = Path(tempfile.mkdtemp()) / "profile.json"
+    con = duckdb.default_connection()
+    con.execute("pragma enable_profiling = 'json'")
+    con.execute(f"pragma profiling_output = '{path}'")
+    return path
+
+
+def _normalize_profile(profile: dict[str, Any]) -> list[dict[str, object]]:
+    """Flatten the operator tree of a JSON profile to operator log rows."""
+    operators: list[dict[str, object]] = []
+
+    def visit(node: dict[str, Any]) -> None:
+        operators.append(
+            {
+                "node_id": len(operators),
+                "operator": node["operator_type"].lower(),
+                "detail": json.dumps(node["extra_info"]),
+                "duration[s]": node["operator_timing"],
+                "rows": node["operator_cardinality"],
+                "bytes": node["result_set_size"],
+            }
+        )
+        for child in node["children"]:
+            visit(child)
+
+    # The root node describes the whole query, not an operator
+    for child in profile["children"]:
+        visit(child)
+    return operators
+
+
 def run_query(query_number: int, context: DuckDBPyRelation) -> None:
     query = context.pl
+
+    if settings.run.duckdb_persistent:
+        library_name = "duckdb-persistent"
+    elif (
+        settings.run.duckdb_in_memory_source != "duckdb"
+        and settings.run.io_type == "skip"
+    ):
+        library_name = f"duckdb-{settings.run.duckdb_in_memory_source}"
+    else:
+        library_name = "duckdb"
+
+    if settings.run.duckdb_profile:
+        library_name += "-profile"
+        profile_path = _enable_profiling()
+
     run_query_generic(
-        query, query_number, "duckdb", query_checker=check_query_result_pl
+        query,
+        query_number,
+        library_name,
+        library_version=duckdb.__version__,
+        query_checker=check_query_result_pl,
     )
+
+    if settings.run.log_timings and _native_load_seconds:
+        metrics = {"native_load[s]": sum(_native_load_seconds.values())}
+        if _handoff_seconds:
+            metrics["handoff[s]"] = sum(_handoff_seconds.values())
+        log_query_metrics(
+            solution=library_name,
+            version=duckdb.__version__,
+            query_number=query_number,
+            metrics=metrics,
+        )
+
+    if settings.run.duckdb_profile:
+        # The profile file is overwritten, so it holds the last iteration
+        with profile_path.open() as f:
+            profile = json.load(f)
+        shutil.rmtree(profile_path.parent)
+
+        if settings.run.log_timings:
+            log_query_operators(
+                solution=library_name,
+                version=duckdb.__version__,
+                query_number=query_number,
+                operators=_normalize_profile(profile),
+            )
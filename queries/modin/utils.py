@@ -5,6 +5,7 @@ from typing import TYPE_CHECKING, Any
 
 import modin.pandas as pd
 
+from queries.catalog import read_catalog_table
 from queries.common_utils import (
     check_query_result_pd,
     get_table_path,
@@ -37,6 +38,10 @@ def _read_ds(table_name: str) -> pd.DataFrame:
         return df
     elif settings.run.io_type == "feather":
         return pd.read_feather(path, dtype_backend="pyarrow")
+    elif settings.run.io_type == "shm":
+        from modin.pandas.utils import from_arrow
+
+        return from_arrow(read_catalog_table(table_name))
     else:
         msg = f"unsupported file type: {settings.run.io_type!r}"
         raise ValueError(msg)
@@ -4,10 +4,12 @@ from typing import TYPE_CHECKING, Any
 
 import pandas as pd
 
+from queries.catalog import read_catalog_table
 from queries.common_utils import (
     check_query_result_pd,
     get_table_path,
     on_second_call,
+    read_mmap_table,
     run_query_generic,
 )
 from settings import Settings
@@ -34,6 +36,11 @@ def _read_ds(table_name: str) -> pd.DataFrame:
         return df
     elif settings.run.io_type == "feather":
         return pd.read_feather(path, dtype_backend="pyarrow")
+    elif settings.run.io_type == "mmap":
+        # Arrow-backed columns wrap the memory-mapped buffers without copying
+        return read_mmap_table(table_name).to_pandas(types_mapper=pd.ArrowDtype)  # type: ignore[no-any-return]
+    elif settings.run.io_type == "shm":
+        return read_catalog_table(table_name).to_pandas(types_mapper=pd.ArrowDtype)  # type: ignore[no-any-return]
     else:
         msg = f"unsupported file type: {settings.run.io_type!r}"
         raise ValueError(msg)
@@ -1,4 +1,11 @@
 from queries.common_utils import execute_all
+from queries.polars.utils import execute_all_batched
+from settings import Settings
+
+settings = Settings()
 
 if __name__ == "__main__":
-    execute_all("polars")
+    if settings.run.polars_batch:
+        execute_all_batched()
+    else:
+        execute_all("polars")
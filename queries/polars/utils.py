@@ -1,14 +1,23 @@
 import pathlib
 import tempfile
 from functools import partial
-from typing import Literal
+from importlib import import_module
+from typing import Any, Literal
 
 import polars as pl
+from linetimer import CodeTimer
 
+from queries.catalog import read_catalog_table
 from queries.common_utils import (
     check_query_result_pl,
+    get_mmap_table_path,
+    get_query_numbers,
     get_table_path,
+    log_query_metrics,
+    log_query_operators,
+    log_query_timing,
     run_query_generic,
+    write_query_answer,
 )
 from settings import Settings
 
@@ -19,11 +28,25 @@ def _scan_ds(table_name: str) -> pl.LazyFrame:
     path = get_table_path(table_name)
 
     if settings.run.io_type == "skip":
-        return pl.read_parquet(path, rechunk=True).lazy()
+        return pl.read_parquet(path, rechunk=settings.run.polars_skip_rechunk).lazy()
     if settings.run.io_type == "parquet":
-        return pl.scan_parquet(path)
+        return pl.scan_parquet(
+            path,
+            parallel=settings.run.polars_scan_parallel,
+            low_memory=settings.run.polars_scan_low_memory,
+            use_statistics=settings.run.polars_scan_use_statistics,
+            rechunk=settings.run.polars_scan_rechunk,
+            cache=settings.run.polars_scan_cache,
+        )
     elif settings.run.io_type == "feather":
         return pl.scan_ipc(path)
+    elif settings.run.io_type == "mmap":
+        return pl.read_ipc(
+            get_mmap_table_path(table_name), memory_map=True, rechunk=False
+        ).lazy()
+    elif settings.run.io_type == "shm":
+        df = pl.from_arrow(read_catalog_table(table_name), rechunk=False)
+        return df.lazy()  # type: ignore[union-attr]
     elif settings.run.io_type == "csv":
         return pl.scan_csv(path, try_parse_dates=True)
     else:
@@ -134,7 +157,47 @@ def obtain_engine_config() -> (
         return pl.GPUEngine(device=device, memory_resource=mr, raise_on_fail=True)
 
 
-def run_query(query_number: int, lf: pl.LazyFrame) -> None:
+def _library_name(solution: str) -> str:
+    if settings.run.polars_gpu:
+        name = f"{solution}-gpu-{settings.run.use_rmm_mr}"
+    elif settings.run.polars_eager:
+        name = f"{solution}-eager"
+    elif settings.run.polars_cloud:
+        name = f"{solution}-cloud"
+    else:
+        name = solution
+
+    disabled = settings.run.polars_disabled_optimization
+    if disabled != "none":
+        name += f"-no-{disabled.replace('_', '-')}"
+    if settings.run.polars_profile:
+        name += "-profile"
+    return name
+
+
+def _collect_kwargs() -> dict[str, Any]:
+    """Return the optimizations to pass to `collect`, if any is turned off."""
+    disabled = settings.run.polars_disabled_optimization
+    if disabled == "none":
+        return {}
+    return {"optimizations": pl.QueryOptFlags(**{disabled: False})}
+
+
+def _normalize_profile(profile: pl.DataFrame) -> list[dict[str, object]]:
+    """Convert the node timings of `LazyFrame.profile` to operator log rows."""
+    return [
+        {
+            "node_id": node_id,
+            "operator": row["node"].split("(")[0],
+            "detail": row["node"],
+            # Start and end are given in microseconds
+            "duration[s]": (row["end"] - row["start"]) / 1e6,
+        }
+        for node_id, row in enumerate(profile.iter_rows(named=True))
+    ]
+
+
+def run_query(query_number: int, lf: pl.LazyFrame, solution: str = "polars") -> None:
     streaming = settings.run.polars_old_streaming
     new_streaming = settings.run.polars_streaming
     eager = settings.run.polars_eager
@@ -144,6 +207,9 @@ def run_query(query_number: int, lf: pl.LazyFrame) -> None:
     if sum([eager, streaming, new_streaming, gpu, cloud]) > 1:
         msg = "Please specify at most one of eager, streaming, new_streaming, cloud or gpu"
         raise ValueError(msg)
+    if settings.run.polars_profile and (gpu or cloud or streaming):
+        msg = "profiling is not supported for the gpu, cloud or old streaming engine"
+        raise ValueError(msg)
     if settings.run.polars_show_plan:
         print(
             lf.explain(  # type: ignore[call-arg]
@@ -153,7 +219,9 @@ def run_query(query_number: int, lf: pl.LazyFrame) -> None:
 
     engine = obtain_engine_config()
     if settings.run.polars_show_plan:
-        print(lf.explain(engine=engine, optimized=not eager))  # type: ignore[arg-type]
+        print(
+            lf.explain(engine=engine, optimized=not eager, **_collect_kwargs())  # type: ignore[arg-type]
+        )
 
     # Eager load engine backend, so we don't time that.
     _preload_engine(engine)
@@ -187,6 +255,17 @@ def run_query(query_number: int, lf: pl.LazyFrame) -> None:
             if settings.run.show_results:
                 print(result.plan())
             return result.lazy().collect()
+    elif settings.run.polars_profile:
+        profiles = []
+
+        def query():  # type: ignore[no-untyped-def]
+            result, profile = lf.profile(
+                no_optimization=eager,
+                engine=engine,  # type: ignore[arg-type]
+                **_collect_kwargs(),
+            )
+            profiles.append(profile)
+            return result
     else:
         query = partial(
             lf.collect,
@@ -194,16 +273,10 @@ def run_query(query_number: int, lf: pl.LazyFrame) -> None:
             new_streaming=new_streaming,
             no_optimization=eager,
             engine=engine,
+            **_collect_kwargs(),
         )
 
-    if gpu:
-        library_name = f"polars-gpu-{settings.run.use_rmm_mr}"
-    elif eager:
-        library_name = "polars-eager"
-    elif cloud:
-        library_name = "polars-cloud"
-    else:
-        library_name = "polars"
+    library_name = _library_name(solution)
 
     try:
         run_query_generic(
@@ -215,3 +288,133 @@ def run_query(query_number: int, lf: pl.LazyFrame) -> None:
         )
     except Exception as e:
         print(f"q{query_number} FAILED\n{e}")
+        return
+
+    if settings.run.polars_profile and settings.run.log_timings:
+        # Only the profile of the last iteration is kept
+        log_query_operators(
+            solution=library_name,
+            version=pl.__version__,
+            query_number=query_number,
+            operators=_normalize_profile(profiles[-1]),
+        )
+
+
+def execute_all_batched() -> None:
+    """Run all queries in the current process, collecting them in batches.
+
+    Every batch is executed query by query and through `pl.collect_all`, which
+    shares scans and common subplans between the queries of the batch. Both use
+    the same table scans. All batches are run once untimed to warm up, after which
+    the two passes take turns going first in every iteration. The batched duration
+    of every iteration is logged as the timing, and the total durations of the
+    fastest iterations and the speedup as metrics, all with query number 0.
+    """
+    if settings.run.polars_cloud or settings.run.polars_old_streaming:
+        msg = "batched execution is not supported for the cloud or old streaming engine"
+        raise ValueError(msg)
+    if settings.run.polars_profile:
+        msg = "batched execution cannot be profiled per query"
+        raise ValueError(msg)
+
+    print(settings.model_dump_json())
+
+    tables = {
+        "lineitem": get_line_item_ds(),
+        "orders": get_orders_ds(),
+        "customer": get_customer_ds(),
+        "region": get_region_ds(),
+        "nation": get_nation_ds(),
+        "supplier": get_supplier_ds(),
+        "part": get_part_ds(),
+        "partsupp": get_part_supp_ds(),
+    }
+    queries = {
+        i: import_module(f"queries.polars.q{i}").q(**tables)
+        for i in get_query_numbers("polars")
+    }
+
+    query_numbers = list(queries)
+    batch_size = settings.run.polars_batch_size or len(query_numbers)
+    batches = [
+        query_numbers[i : i + batch_size]
+        for i in range(0, len(query_numbers), batch_size)
+    ]
+
+    engine = obtain_engine_config()
+    _preload_engine(engine)
+    eager = settings.run.polars_eager
+
+    library_name = _library_name("polars-batch")
+
+    def run_sequential(batch: list[int]) -> list[pl.DataFrame]:
+        return [
+            queries[i].collect(
+                no_optimization=eager, engine=engine, **_collect_kwargs()
+            )
+            for i in batch
+        ]
+
+    def run_batched(batch: list[int]) -> list[pl.DataFrame]:
+        return pl.collect_all(
+            [queries[i] for i in batch],
+            no_optimization=eager,
+            engine=engine,  # type: ignore[arg-type]
+            **_collect_kwargs(),
+        )
+
+    # Warm up the caches for both passes, so the first timed pass is not penalized
+    for batch in batches:
+        run_batched(batch)
+
+    passes = {"sequentially": run_sequential, "batched": run_batched}
+    totals: dict[str, list[float]] = {pass_name: [] for pass_name in passes}
+    for iteration in range(settings.run.iterations):
+        durations = dict.fromkeys(passes, 0.0)
+        # Alternate the order of the passes, so neither always runs first
+        order = list(passes) if iteration % 2 == 0 else list(reversed(passes))
+        for batch in batches:
+            name = f"queries {batch[0]}-{batch[-1]}"
+            for pass_name in order:
+                with CodeTimer(
+                    name=f"Run {library_name} {name} {pass_name}", unit="s"
+                ) as t:
+                    results = passes[pass_name](batch)
+                durations[pass_name] += t.took
+
+            # The batched pass runs last in the first iteration, its results are checked
+            if iteration > 0:
+                continue
+            for i, result in zip(batch, results, strict=True):
+                if settings.run.check_results:
+                    check_query_result_pl(result, i)
+                if settings.run.write_answers:
+                    write_query_answer(result, i)
+                if settings.run.show_results:
+                    print(result)
+
+        for pass_name, duration in durations.items():
+            totals[pass_name].append(duration)
+        if settings.run.log_timings:
+            log_query_timing(
+                solution=library_name,
+                version=pl.__version__,
+                query_number=0,
+                time=durations["batched"],
+            )
+
+    sequential, batched = min(totals["sequentially"]), min(totals["batched"])
+    print(f"Speedup of batched over sequential execution: {sequential / batched:.2f}x")
+
+    if settings.run.log_timings:
+        log_query_metrics(
+            solution=library_name,
+            version=pl.__version__,
+            query_number=0,
+            metrics={
+                "n_batches": len(batches),
+                "sequential[s]": sequential,
+                "batched[s]": batched,
+                "speedup": sequential / batched,
+            },
+        )
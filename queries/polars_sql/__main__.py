@@ -0,0 +1,4 @@
+from queries.common_utils import execute_all
+
+if __name__ == "__main__":
+    execute_all("polars_sql")
@@ -0,0 +1,48 @@
+from queries.polars_sql import utils
+
+Q_NUM = 10
+
+
+def q() -> None:
+    query_str = """
+    select
+        c_custkey,
+        c_name,
+        round(sum(l_extendedprice * (1 - l_discount)), 2) as revenue,
+        c_acctbal,
+        n_name,
+        c_address,
+        c_phone,
+        c_comment
+    from
+        customer
+        join orders on customer.c_custkey = orders.o_custkey
+        join lineitem on lineitem.l_orderkey = orders.o_orderkey
+        join nation on customer.c_nationkey = nation.n_nationkey
+    where
+        o_orderdate >= date '1993-10-01'
+        and o_orderdate < date '1994-01-01'
+        and l_returnflag = 'R'
+    group by
+        c_custkey,
+        c_name,
+        c_acctbal,
+        c_phone,
+        n_name,
+        c_address,
+        c_comment
+    order by
+        revenue desc
+    limit 20
+    """
+
+    utils.get_customer_ds()
+    utils.get_orders_ds()
+    utils.get_line_item_ds()
+    utils.get_nation_ds()
+
+    utils.run_query(Q_NUM, query_str)
+
+
+if __name__ == "__main__":
+    q()
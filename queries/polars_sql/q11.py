@@ -0,0 +1,55 @@
+from queries.polars_sql import utils
+from settings import Settings
+
+settings = Settings()
+
+Q_NUM = 11
+
+
+def q() -> None:
+    scale_factor = settings.scale_factor
+    fraction = 0.0001 / scale_factor
+
+    query_str = f"""
+    select
+        ps_partkey,
+        round(value, 2) as value
+    from
+        (
+            select
+                ps_partkey,
+                sum(ps_supplycost * ps_availqty) as value
+            from
+                partsupp
+                join supplier on partsupp.ps_suppkey = supplier.s_suppkey
+                join nation on supplier.s_nationkey = nation.n_nationkey
+            where
+                n_name = 'GERMANY'
+            group by
+                ps_partkey
+        ) as part_value
+        cross join (
+            select
+                sum(ps_supplycost * ps_availqty) * {fraction} as threshold
+            from
+                partsupp
+                join supplier on partsupp.ps_suppkey = supplier.s_suppkey
+                join nation on supplier.s_nationkey = nation.n_nationkey
+            where
+                n_name = 'GERMANY'
+        ) as total_value
+    where
+        value > threshold
+    order by
+        value desc
+    """
+
+    utils.get_part_supp_ds()
+    utils.get_supplier_ds()
+    utils.get_nation_ds()
+
+    utils.run_query(Q_NUM, query_str)
+
+
+if __name__ == "__main__":
+    q()
@@ -0,0 +1,44 @@
+from queries.polars_sql import utils
+
+Q_NUM = 12
+
+
+def q() -> None:
+    query_str = """
+    select
+        l_shipmode,
+        sum(case
+            when o_orderpriority = '1-URGENT'
+                or o_orderpriority = '2-HIGH'
+                then 1
+            else 0
+        end) as high_line_count,
+        sum(case
+            when o_orderpriority <> '1-URGENT'
+                and o_orderpriority <> '2-HIGH'
+                then 1
+            else 0
+        end) as low_line_count
+    from
+        orders
+        join lineitem on orders.o_orderkey = lineitem.l_orderkey
+    where
+        l_shipmode in ('MAIL', 'SHIP')
+        and l_commitdate < l_receiptdate
+        and l_shipdate < l_commitdate
+        and l_receiptdate >= date '1994-01-01'
+        and l_receiptdate < date '1995-01-01'
+    group by
+        l_shipmode
+    order by
+        l_shipmode
+    """
+
+    utils.get_orders_ds()
+    utils.get_line_item_ds()
+
+    utils.run_query(Q_NUM, query_str)
+
+
+if __name__ == "__main__":
+    q()
@@ -0,0 +1,42 @@
+from queries.polars_sql import utils
+
+Q_NUM = 13
+
+
+def q() -> None:
+    query_str = """
+    select
+        c_count,
+        count(*) as custdist
+    from (
+        select
+            c_custkey,
+            count(o_orderkey) as c_count
+        from
+            customer
+            left outer join (
+                select
+                    *
+                from
+                    orders
+                where
+                    o_comment not like '%special%requests%'
+            ) as filtered_orders on customer.c_custkey = filtered_orders.o_custkey
+        group by
+            c_custkey
+        ) as c_orders
+    group by
+        c_count
+    order by
+        custdist desc,
+        c_count desc
+    """
+
+    utils.get_customer_ds()
+    utils.get_orders_ds()
+
+    utils.run_query(Q_NUM, query_str)
+
+
+if __name__ == "__main__":
+    q()
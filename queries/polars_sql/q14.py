@@ -0,0 +1,29 @@
+from queries.polars_sql import utils
+
+Q_NUM = 14
+
+
+def q() -> None:
+    query_str = """
+    select
+        round(100.00 * sum(case
+            when p_type like 'PROMO%'
+                then l_extendedprice * (1 - l_discount)
+            else 0
+        end) / sum(l_extendedprice * (1 - l_discount)), 2) as promo_revenue
+    from
+        lineitem
+        join part on lineitem.l_partkey = part.p_partkey
+    where
+        l_shipdate >= date '1995-09-01'
+        and l_shipdate < date '1995-10-01'
+    """
+
+    utils.get_line_item_ds()
+    utils.get_part_ds()
+
+    utils.run_query(Q_NUM, query_str)
+
+
+if __name__ == "__main__":
+    q()
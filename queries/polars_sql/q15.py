@@ -0,0 +1,48 @@
+from queries.polars_sql import utils
+
+Q_NUM = 15
+
+
+def q() -> None:
+    query_str = """
+    with revenue as (
+        select
+            l_suppkey as supplier_no,
+            sum(l_extendedprice * (1 - l_discount)) as total_revenue
+        from
+            lineitem
+        where
+            l_shipdate >= date '1996-01-01'
+            and l_shipdate < date '1996-04-01'
+        group by
+            l_suppkey
+    )
+    select
+        s_suppkey,
+        s_name,
+        s_address,
+        s_phone,
+        total_revenue
+    from
+        supplier
+        join revenue on supplier.s_suppkey = revenue.supplier_no
+        cross join (
+            select
+                max(total_revenue) as max_revenue
+            from
+                revenue
+        ) as max_revenue
+    where
+        total_revenue = max_revenue
+    order by
+        s_suppkey
+    """
+
+    utils.get_line_item_ds()
+    utils.get_supplier_ds()
+
+    utils.run_query(Q_NUM, query_str)
+
+
+if __name__ == "__main__":
+    q()
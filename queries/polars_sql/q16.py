@@ -0,0 +1,47 @@
+from queries.polars_sql import utils
+
+Q_NUM = 16
+
+
+def q() -> None:
+    query_str = """
+    select
+        p_brand,
+        p_type,
+        p_size,
+        count(distinct ps_suppkey) as supplier_cnt
+    from
+        partsupp
+        join part on part.p_partkey = partsupp.ps_partkey
+    where
+        p_brand <> 'Brand#45'
+        and p_type not like 'MEDIUM POLISHED%'
+        and p_size in (49, 14, 23, 45, 19, 3, 36, 9)
+        and ps_suppkey not in (
+            select
+                s_suppkey
+            from
+                supplier
+            where
+                s_comment like '%Customer%Complaints%'
+        )
+    group by
+        p_brand,
+        p_type,
+        p_size
+    order by
+        supplier_cnt desc,
+        p_brand,
+        p_type,
+        p_size
+    """
+
+    utils.get_part_supp_ds()
+    utils.get_part_ds()
+    utils.get_supplier_ds()
+
+    utils.run_query(Q_NUM, query_str)
+
+
+if __name__ == "__main__":
+    q()
@@ -0,0 +1,35 @@
+from queries.polars_sql import utils
+
+Q_NUM = 17
+
+
+def q() -> None:
+    query_str = """
+    select
+        round(sum(l_extendedprice) / 7.0, 2) as avg_yearly
+    from
+        lineitem
+        join part on part.p_partkey = lineitem.l_partkey
+        join (
+            select
+                l_partkey as avg_partkey,
+                0.2 * avg(l_quantity) as avg_quantity
+            from
+                lineitem
+            group by
+                l_partkey
+        ) as part_avg on part.p_partkey = part_avg.avg_partkey
+    where
+        p_brand = 'Brand#23'
+        and p_container = 'MED BOX'
+        and l_quantity < avg_quantity
+    """
+
+    utils.get_line_item_ds()
+    utils.get_part_ds()
+
+    utils.run_query(Q_NUM, query_str)
+
+
+if __name__ == "__main__":
+    q()
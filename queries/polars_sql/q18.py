@@ -0,0 +1,50 @@
+from queries.polars_sql import utils
+
+Q_NUM = 18
+
+
+def q() -> None:
+    query_str = """
+    select
+        c_name,
+        c_custkey,
+        o_orderkey,
+        o_orderdate as o_orderdat,
+        o_totalprice,
+        sum(l_quantity) as col6
+    from
+        customer
+        join orders on customer.c_custkey = orders.o_custkey
+        join lineitem on orders.o_orderkey = lineitem.l_orderkey
+        join (
+            select
+                l_orderkey as large_orderkey,
+                sum(l_quantity) as sum_quantity
+            from
+                lineitem
+            group by
+                l_orderkey
+            having
+                sum_quantity > 300
+        ) as large_orders on orders.o_orderkey = large_orders.large_orderkey
+    group by
+        c_name,
+        c_custkey,
+        o_orderkey,
+        o_orderdate,
+        o_totalprice
+    order by
+        o_totalprice desc,
+        o_orderdat
+    limit 100
+    """
+
+    utils.get_customer_ds()
+    utils.get_orders_ds()
+    utils.get_line_item_ds()
+
+    utils.run_query(Q_NUM, query_str)
+
+
+if __name__ == "__main__":
+    q()
@@ -0,0 +1,60 @@
+from queries.polars_sql import utils
+
+Q_NUM = 2
+
+
+def q() -> None:
+    query_str = """
+    select
+        s_acctbal,
+        s_name,
+        n_name,
+        p_partkey,
+        p_mfgr,
+        s_address,
+        s_phone,
+        s_comment
+    from
+        part
+        join partsupp on part.p_partkey = partsupp.ps_partkey
+        join supplier on supplier.s_suppkey = partsupp.ps_suppkey
+        join nation on supplier.s_nationkey = nation.n_nationkey
+        join region on nation.n_regionkey = region.r_regionkey
+        join (
+            select
+                ps_partkey as min_partkey,
+                min(ps_supplycost) as min_supplycost
+            from
+                partsupp
+                join supplier on supplier.s_suppkey = partsupp.ps_suppkey
+                join nation on supplier.s_nationkey = nation.n_nationkey
+                join region on nation.n_regionkey = region.r_regionkey
+            where
+                r_name = 'EUROPE'
+            group by
+                ps_partkey
+        ) as min_cost on part.p_partkey = min_cost.min_partkey
+    where
+        p_size = 15
+        and p_type like '%BRASS'
+        and r_name = 'EUROPE'
+        and ps_supplycost = min_supplycost
+    order by
+        s_acctbal desc,
+        n_name,
+        s_name,
+        p_partkey
+    limit 100
+    """
+
+    utils.get_part_ds()
+    utils.get_part_supp_ds()
+    utils.get_supplier_ds()
+    utils.get_nation_ds()
+    utils.get_region_ds()
+
+    utils.run_query(Q_NUM, query_str)
+
+
+if __name__ == "__main__":
+    q()
@@ -0,0 +1,61 @@
+from queries.polars_sql import utils
+
+Q_NUM = 20
+
+
+def q() -> None:
+    query_str = """
+    select
+        s_name,
+        s_address
+    from
+        supplier
+        join nation on supplier.s_nationkey = nation.n_nationkey
+    where
+        s_suppkey in (
+            select
+                ps_suppkey
+            from
+                partsupp
+                join (
+                    select
+                        l_partkey,
+                        l_suppkey,
+                        0.5 * sum(l_quantity) as sum_quantity
+                    from
+                        lineitem
+                    where
+                        l_shipdate >= date '1994-01-01'
+                        and l_shipdate < date '1995-01-01'
+                    group by
+                        l_partkey,
+                        l_suppkey
+                ) as shipped on partsupp.ps_partkey = shipped.l_partkey
+                    and partsupp.ps_suppkey = shipped.l_suppkey
+            where
+                ps_partkey in (
+                    select
+                        p_partkey
+                    from
+                        part
+                    where
+                        p_name like 'forest%'
+                )
+                and ps_availqty > sum_quantity
+        )
+        and n_name = 'CANADA'
+    order by
+        s_name
+    """
+
+    utils.get_supplier_ds()
+    utils.get_nation_ds()
+    utils.get_part_supp_ds()
+    utils.get_line_item_ds()
+    utils.get_part_ds()
+
+    utils.run_query(Q_NUM, query_str)
+
+
+if __name__ == "__main__":
+    q()
@@ -0,0 +1,60 @@
+from queries.polars_sql import utils
+
+Q_NUM = 21
+
+
+def q() -> None:
+    query_str = """
+    select
+        s_name,
+        count(*) as numwait
+    from
+        supplier
+        join lineitem l1 on supplier.s_suppkey = l1.l_suppkey
+        join orders on orders.o_orderkey = l1.l_orderkey
+        join nation on supplier.s_nationkey = nation.n_nationkey
+        join (
+            select
+                l_orderkey as multi_orderkey,
+                count(distinct l_suppkey) as n_suppliers
+            from
+                lineitem
+            group by
+                l_orderkey
+            having
+                n_suppliers > 1
+        ) as multi_supplier on l1.l_orderkey = multi_supplier.multi_orderkey
+        join (
+            select
+                l_orderkey as late_orderkey,
+                count(distinct l_suppkey) as n_late_suppliers
+            from
+                lineitem
+            where
+                l_receiptdate > l_commitdate
+            group by
+                l_orderkey
+        ) as late_supplier on l1.l_orderkey = late_supplier.late_orderkey
+    where
+        o_orderstatus = 'F'
+        and l1.l_receiptdate > l1.l_commitdate
+        and n_late_suppliers = 1
+        and n_name = 'SAUDI ARABIA'
+    group by
+        s_name
+    order by
+        numwait desc,
+        s_name
+    limit 100
+    """
+
+    utils.get_supplier_ds()
+    utils.get_line_item_ds()
+    utils.get_orders_ds()
+    utils.get_nation_ds()
+
+    utils.run_query(Q_NUM, query_str)
+
+
+if __name__ == "__main__":
+    q()
@@ -0,0 +1,50 @@
+from queries.polars_sql import utils
+
+Q_NUM = 22
+
+
+def q() -> None:
+    query_str = """
+    select
+        cntrycode,
+        count(*) as numcust,
+        sum(c_acctbal) as totacctbal
+    from (
+        select
+            substr(c_phone, 1, 2) as cntrycode,
+            c_acctbal
+        from
+            customer
+            cross join (
+                select
+                    avg(c_acctbal) as avg_acctbal
+                from
+                    customer
+                where
+                    c_acctbal > 0.00
+                    and substr(c_phone, 1, 2) in ('13', '31', '23', '29', '30', '18', '17')
+            ) as avg_customer
+        where
+            substr(c_phone, 1, 2) in ('13', '31', '23', '29', '30', '18', '17')
+            and c_acctbal > avg_acctbal
+            and c_custkey not in (
+                select
+                    o_custkey
+                from
+                    orders
+            )
+        ) as custsale
+    group by
+        cntrycode
+    order by
+        cntrycode
+    """
+
+    utils.get_customer_ds()
+    utils.get_orders_ds()
+
+    utils.run_query(Q_NUM, query_str)
+
+
+if __name__ == "__main__":
+    q()
@@ -0,0 +1,39 @@
+from queries.polars_sql import utils
+
+Q_NUM = 3
+
+
+def q() -> None:
+    query_str = """
+    select
+        l_orderkey,
+        sum(l_extendedprice * (1 - l_discount)) as revenue,
+        o_orderdate,
+        o_shippriority
+    from
+        customer
+        join orders on customer.c_custkey = orders.o_custkey
+        join lineitem on lineitem.l_orderkey = orders.o_orderkey
+    where
+        c_mktsegment = 'BUILDING'
+        and o_orderdate < date '1995-03-15'
+        and l_shipdate > date '1995-03-15'
+    group by
+        l_orderkey,
+        o_orderdate,
+        o_shippriority
+    order by
+        revenue desc,
+        o_orderdate
+    limit 10
+    """
+
+    utils.get_customer_ds()
+    utils.get_orders_ds()
+    utils.get_line_item_ds()
+
+    utils.run_query(Q_NUM, query_str)
+
+
+if __name__ == "__main__":
+    q()
@@ -0,0 +1,37 @@
+from queries.polars_sql import utils
+
+Q_NUM = 4
+
+
+def q() -> None:
+    query_str = """
+    select
+        o_orderpriority,
+        count(*) as order_count
+    from
+        orders
+    where
+        o_orderdate >= date '1993-07-01'
+        and o_orderdate < date '1993-10-01'
+        and o_orderkey in (
+            select
+                l_orderkey
+            from
+                lineitem
+            where
+                l_commitdate < l_receiptdate
+        )
+    group by
+        o_orderpriority
+    order by
+        o_orderpriority
+    """
+
+    utils.get_orders_ds()
+    utils.get_line_item_ds()
+
+    utils.run_query(Q_NUM, query_str)
+
+
+if __name__ == "__main__":
+    q()
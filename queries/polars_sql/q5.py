@@ -0,0 +1,40 @@
+from queries.polars_sql import utils
+
+Q_NUM = 5
+
+
+def q() -> None:
+    query_str = """
+    select
+        n_name,
+        sum(l_extendedprice * (1 - l_discount)) as revenue
+    from
+        customer
+        join orders on customer.c_custkey = orders.o_custkey
+        join lineitem on lineitem.l_orderkey = orders.o_orderkey
+        join supplier on lineitem.l_suppkey = supplier.s_suppkey
+            and customer.c_nationkey = supplier.s_nationkey
+        join nation on supplier.s_nationkey = nation.n_nationkey
+        join region on nation.n_regionkey = region.r_regionkey
+    where
+        r_name = 'ASIA'
+        and o_orderdate >= date '1994-01-01'
+        and o_orderdate < date '1995-01-01'
+    group by
+        n_name
+    order by
+        revenue desc
+    """
+
+    utils.get_customer_ds()
+    utils.get_orders_ds()
+    utils.get_line_item_ds()
+    utils.get_supplier_ds()
+    utils.get_nation_ds()
+    utils.get_region_ds()
+
+    utils.run_query(Q_NUM, query_str)
+
+
+if __name__ == "__main__":
+    q()
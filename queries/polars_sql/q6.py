@@ -0,0 +1,25 @@
+from queries.polars_sql import utils
+
+Q_NUM = 6
+
+
+def q() -> None:
+    query_str = """
+    select
+        sum(l_extendedprice * l_discount) as revenue
+    from
+        lineitem
+    where
+        l_shipdate >= date '1994-01-01'
+        and l_shipdate < date '1995-01-01'
+        and l_discount between 0.05 and 0.07
+        and l_quantity < 24
+    """
+
+    utils.get_line_item_ds()
+
+    utils.run_query(Q_NUM, query_str)
+
+
+if __name__ == "__main__":
+    q()
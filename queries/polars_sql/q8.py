@@ -0,0 +1,54 @@
+from queries.polars_sql import utils
+
+Q_NUM = 8
+
+
+def q() -> None:
+    query_str = """
+    select
+        o_year,
+        round(
+            sum(case
+                when nation = 'BRAZIL' then volume
+                else 0
+            end) / sum(volume)
+        , 2) as mkt_share
+    from
+        (
+            select
+                extract(year from o_orderdate) as o_year,
+                l_extendedprice * (1 - l_discount) as volume,
+                n2.n_name as nation
+            from
+                part
+                join lineitem on part.p_partkey = lineitem.l_partkey
+                join supplier on supplier.s_suppkey = lineitem.l_suppkey
+                join orders on lineitem.l_orderkey = orders.o_orderkey
+                join customer on orders.o_custkey = customer.c_custkey
+                join nation n1 on customer.c_nationkey = n1.n_nationkey
+                join region on n1.n_regionkey = region.r_regionkey
+                join nation n2 on supplier.s_nationkey = n2.n_nationkey
+            where
+                r_name = 'AMERICA'
+                and o_orderdate between date '1995-01-01' and date '1996-12-31'
+                and p_type = 'ECONOMY ANODIZED STEEL'
+        ) as all_nations
+    group by
+        o_year
+    order by
+        o_year
+    """
+
+    utils.get_part_ds()
+    utils.get_line_item_ds()
+    utils.get_supplier_ds()
+    utils.get_orders_ds()
+    utils.get_customer_ds()
+    utils.get_nation_ds()
+    utils.get_region_ds()
+
+    utils.run_query(Q_NUM, query_str)
+
+
+if __name__ == "__main__":
+    q()
@@ -0,0 +1,48 @@
+from queries.polars_sql import utils
+
+Q_NUM = 9
+
+
+def q() -> None:
+    query_str = """
+    select
+        nation,
+        o_year,
+        round(sum(amount), 2) as sum_profit
+    from
+        (
+            select
+                n_name as nation,
+                extract(year from o_orderdate) as o_year,
+                l_extendedprice * (1 - l_discount) - ps_supplycost * l_quantity as amount
+            from
+                part
+                join lineitem on part.p_partkey = lineitem.l_partkey
+                join supplier on supplier.s_suppkey = lineitem.l_suppkey
+                join partsupp on partsupp.ps_suppkey = lineitem.l_suppkey
+                    and partsupp.ps_partkey = lineitem.l_partkey
+                join orders on orders.o_orderkey = lineitem.l_orderkey
+                join nation on supplier.s_nationkey = nation.n_nationkey
+            where
+                p_name like '%green%'
+        ) as profit
+    group by
+        nation,
+        o_year
+    order by
+        nation,
+        o_year desc
+    """
+
+    utils.get_part_ds()
+    utils.get_line_item_ds()
+    utils.get_supplier_ds()
+    utils.get_part_supp_ds()
+    utils.get_orders_ds()
+    utils.get_nation_ds()
+
+    utils.run_query(Q_NUM, query_str)
+
+
+if __name__ == "__main__":
+    q()
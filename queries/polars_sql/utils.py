@@ -0,0 +1,50 @@
+import polars as pl
+
+from queries.polars import utils as polars_utils
+
+# The queries refer to the tables by name, so every scan is registered here
+_context = pl.SQLContext()
+
+
+def _register(table_name: str, lf: pl.LazyFrame) -> pl.LazyFrame:
+    _context.register(table_name, lf)
+    return lf
+
+
+def get_line_item_ds() -> pl.LazyFrame:
+    return _register("lineitem", polars_utils.get_line_item_ds())
+
+
+def get_orders_ds() -> pl.LazyFrame:
+    return _register("orders", polars_utils.get_orders_ds())
+
+
+def get_customer_ds() -> pl.LazyFrame:
+    return _register("customer", polars_utils.get_customer_ds())
+
+
+def get_region_ds() -> pl.LazyFrame:
+    return _register("region", polars_utils.get_region_ds())
+
+
+def get_nation_ds() -> pl.LazyFrame:
+    return _register("nation", polars_utils.get_nation_ds())
+
+
+def get_supplier_ds() -> pl.LazyFrame:
+    return _register("supplier", polars_utils.get_supplier_ds())
+
+
+def get_part_ds() -> pl.LazyFrame:
+    return _register("part", polars_utils.get_part_ds())
+
+
+def get_part_supp_ds() -> pl.LazyFrame:
+    return _register("partsupp", polars_utils.get_part_supp_ds())
+
+
+def run_query(query_number: int, query_str: str) -> None:
+    # Translating the SQL into a LazyFrame is not timed, like building the
+    # query in the other Polars solution
+    lf = _context.execute(query_str)
+    polars_utils.run_query(query_number, lf, solution="polars-sql")
@@ -1,4 +1,11 @@
 from queries.common_utils import execute_all
+from queries.pyspark.utils import execute_all_in_session
+from settings import Settings
+
+settings = Settings()
 
 if __name__ == "__main__":
-    execute_all("pyspark")
+    if settings.run.spark_reuse_session:
+        execute_all_in_session()
+    else:
+        execute_all("pyspark")
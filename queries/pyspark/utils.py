@@ -1,43 +1,108 @@
 from __future__ import annotations
 
-from typing import TYPE_CHECKING
+import json
+import time
+import urllib.request
+from contextlib import contextmanager
+from datetime import datetime
+from functools import cache
+from importlib import import_module
+from typing import TYPE_CHECKING, Any
 
+import pyspark
+from linetimer import CodeTimer
 from pyspark.sql import SparkSession
 
 from queries.common_utils import (
     check_query_result_pd,
+    get_query_numbers,
     get_table_path,
+    log_query_metrics,
+    record_table_read,
     run_query_generic,
 )
 from settings import Settings
 
 if TYPE_CHECKING:
+    from collections.abc import Iterator
+
     from pyspark.sql import DataFrame
 
 settings = Settings()
 
+# Set while warming up the JVM, in which case query results are not timed
+_warming_up = False
+
+
+def _memory_to_mb(memory: str) -> int:
+    """Convert a JVM memory string such as `512m` or `2g` to mebibytes."""
+    units = {"k": 1 / 1024, "m": 1, "g": 1024, "t": 1024**2}
+    memory = memory.strip().lower().removesuffix("b")
+    if memory[-1] in units:
+        return int(float(memory[:-1]) * units[memory[-1]])
+    return int(memory)
+
+
+def _get_master() -> str:
+    n_executors = settings.run.spark_executors
+    if n_executors is None:
+        return f"local[{settings.run.spark_cores or '*'}]"
+
+    # Standalone master and workers in separate JVMs, one executor per worker
+    cores = settings.run.spark_executor_cores
+    memory = _memory_to_mb(settings.run.spark_executor_memory)
+    return f"local-cluster[{n_executors},{cores},{memory}]"
+
 
 def get_or_create_spark() -> SparkSession:
+    builder = SparkSession.builder
+    if settings.run.spark_event_log_dir is not None:
+        settings.run.spark_event_log_dir.mkdir(parents=True, exist_ok=True)
+        builder = builder.config("spark.eventLog.enabled", "true").config(
+            "spark.eventLog.dir", settings.run.spark_event_log_dir.resolve().as_uri()
+        )
+
     spark = (
-        SparkSession.builder.appName("spark_queries")
-        .master("local[*]")
+        builder.appName("spark_queries")
+        .master(_get_master())
         .config("spark.driver.memory", settings.run.spark_driver_memory)
         .config("spark.executor.memory", settings.run.spark_executor_memory)
         .config("spark.log.level", settings.run.spark_log_level)
+        .config(
+            "spark.sql.execution.arrow.pyspark.enabled",
+            str(settings.run.spark_arrow).lower(),
+        )
+        .config("spark.sql.shuffle.partitions", settings.run.spark_shuffle_partitions)
+        .config("spark.sql.adaptive.enabled", str(settings.run.spark_adaptive).lower())
+        .config(
+            "spark.sql.adaptive.skewJoin.enabled",
+            str(settings.run.spark_skew_join).lower(),
+        )
+        .config(
+            "spark.sql.autoBroadcastJoinThreshold",
+            settings.run.spark_broadcast_threshold,
+        )
+        .config("spark.sql.codegen.wholeStage", str(settings.run.spark_codegen).lower())
         .getOrCreate()
     )
     return spark
 
 
 def _read_ds(table_name: str) -> DataFrame:
-    if settings.run.io_type == "skip":
-        # TODO: Persist data in memory before query
-        msg = "cannot run PySpark starting from an in-memory representation"
-        raise RuntimeError(msg)
+    # Tables are loaded once per session, but every query that uses them reads them
+    record_table_read(table_name)
+    return _load_ds(table_name)
+
 
+@cache
+def _load_ds(table_name: str) -> DataFrame:
     path = get_table_path(table_name)
 
-    if settings.run.io_type == "parquet":
+    if settings.run.io_type == "skip":
+        df = get_or_create_spark().read.parquet(str(path)).cache()
+        # Materialize the cache now so that reading is not part of the query
+        df.count()
+    elif settings.run.io_type == "parquet":
         df = get_or_create_spark().read.parquet(str(path))
     elif settings.run.io_type == "csv":
         df = get_or_create_spark().read.csv(str(path), header=True, inferSchema=True)
@@ -81,8 +146,156 @@ def get_part_supp_ds() -> DataFrame:
     return _read_ds("partsupp")
 
 
+def _library_name() -> str:
+    library_name = "pyspark"
+    if settings.run.spark_executors is not None:
+        library_name += "-local-cluster"
+    if not settings.run.spark_arrow:
+        library_name += "-no-arrow"
+    if settings.run.spark_reuse_session:
+        library_name += "-session"
+    return library_name
+
+
+def _get_stages(stage_ids: set[int]) -> list[dict[str, Any]]:
+    """Get the stage data of the given stages from the Spark UI REST API."""
+    sc = get_or_create_spark().sparkContext
+    base_url = f"{sc.uiWebUrl}/api/v1/applications/{sc.applicationId}"
+
+    def get(path: str) -> Any:
+        with urllib.request.urlopen(f"{base_url}/{path}") as response:
+            return json.load(response)
+
+    stages = []
+    for stage_id in sorted(stage_ids):
+        # The UI is updated asynchronously, so the stage may still be finishing
+        for _ in range(50):
+            stage = get(f"stages/{stage_id}")[-1]
+            if stage["status"] != "ACTIVE":
+                break
+            time.sleep(0.1)
+
+        if stage["status"] != "COMPLETE":
+            continue
+
+        summary = get(
+            f"stages/{stage_id}/{stage['attemptId']}/taskSummary?quantiles=0.5,1.0"
+        )
+        stage["medianTaskDuration"], stage["maxTaskDuration"] = summary["duration"]
+        stages.append(stage)
+    return stages
+
+
+def _stage_duration(stage: dict[str, Any]) -> float:
+    fmt = "%Y-%m-%dT%H:%M:%S.%f%Z"
+    start = datetime.strptime(stage["submissionTime"], fmt)
+    end = datetime.strptime(stage["completionTime"], fmt)
+    return (end - start).total_seconds()
+
+
+@contextmanager
+def _collect_stage_metrics() -> Iterator[dict[str, float]]:
+    """Collect the metrics of the Spark stages that run within the context.
+
+    Task skew is the ratio of the slowest to the median task duration, for the most
+    skewed stage. Times reported by Spark in milliseconds are converted to seconds.
+    """
+    sc = get_or_create_spark().sparkContext
+    group = f"query-{time.monotonic_ns()}"
+    sc.setJobGroup(group, group)
+
+    # Later jobs stay in this group until the next query sets its own
+    metrics: dict[str, float] = {}
+    yield metrics
+
+    tracker = sc.statusTracker()
+    stage_ids = {
+        stage_id
+        for job_id in tracker.getJobIdsForGroup(group)
+        if (job := tracker.getJobInfo(job_id)) is not None
+        for stage_id in job.stageIds
+    }
+    stages = _get_stages(stage_ids)
+
+    durations = [_stage_duration(s) for s in stages]
+    metrics["n_stages"] = len(stages)
+    metrics["stages[s]"] = sum(durations)
+    metrics["slowest_stage[s]"] = max(durations, default=0.0)
+    metrics["executor_run[s]"] = sum(s["executorRunTime"] for s in stages) / 1000
+    metrics["gc[s]"] = sum(s["jvmGcTime"] for s in stages) / 1000
+    metrics["shuffle_read[bytes]"] = sum(s["shuffleReadBytes"] for s in stages)
+    metrics["shuffle_write[bytes]"] = sum(s["shuffleWriteBytes"] for s in stages)
+    metrics["spill_memory[bytes]"] = sum(s["memoryBytesSpilled"] for s in stages)
+    metrics["spill_disk[bytes]"] = sum(s["diskBytesSpilled"] for s in stages)
+    metrics["task_skew"] = max(
+        (
+            s["maxTaskDuration"] / s["medianTaskDuration"]
+            for s in stages
+            if s["medianTaskDuration"] > 0
+        ),
+        default=1.0,
+    )
+
+
 def run_query(query_number: int, df: DataFrame) -> None:
     query = df.toPandas
+    if _warming_up:
+        query()
+        return
+
     run_query_generic(
-        query, query_number, "pyspark", query_checker=check_query_result_pd
+        query,
+        query_number,
+        _library_name(),
+        library_version=pyspark.__version__,
+        query_checker=check_query_result_pd,
+        metrics_collectors=(
+            [_collect_stage_metrics] if settings.run.spark_stage_metrics else []
+        ),
     )
+
+
+@contextmanager
+def _warm_up() -> Iterator[None]:
+    global _warming_up
+    _warming_up = True
+    try:
+        yield
+    finally:
+        _warming_up = False
+
+
+def execute_all_in_session() -> None:
+    """Run all queries in the current process, sharing a single Spark session.
+
+    Tables are registered as temp views once and reused by all queries. The JVM
+    startup time is logged as a metric with query number 0.
+    """
+    print(settings.model_dump_json())
+
+    queries = [
+        import_module(f"queries.pyspark.q{i}").q for i in get_query_numbers("pyspark")
+    ]
+
+    with CodeTimer(name="Start Spark session", unit="s") as timer:
+        get_or_create_spark()
+
+    if settings.run.log_timings:
+        log_query_metrics(
+            solution=_library_name(),
+            version=pyspark.__version__,
+            query_number=0,
+            metrics={"jvm_startup[s]": timer.took},
+        )
+
+    for i in range(settings.run.spark_warmup_passes):
+        with (
+            CodeTimer(name=f"Warm-up pass {i + 1} of ALL pyspark queries", unit="s"),
+            _warm_up(),
+        ):
+            for query in queries:
+                query()
+
+    with CodeTimer(name="Overall execution of ALL pyspark queries", unit="s"):
+        for query in queries:
+            query()
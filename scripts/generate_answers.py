@@ -0,0 +1,84 @@
+"""Generate reference answers for the queries at the configured scale factor.
+
+Official answers only exist for scale factor 1. For other scale factors, the answers
+are computed once by a reference solution and stored next to the data tables,
+together with a hash of the tables they were computed from. Results are then
+checked against them with `RUN_CHECK_RESULTS=1`.
+
+To use this script, run:
+
+```shell
+SCALE_FACTOR=10 .venv/bin/python -m scripts.generate_answers --reference duckdb
+```
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import sys
+from importlib.metadata import version
+
+from queries.common_utils import get_manifest_hash, get_query_numbers
+from settings import Settings
+
+settings = Settings()
+
+# Solutions whose package is named differently, all others are named after it
+PACKAGE_NAMES = {"polars_sql": "polars"}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Generate reference answers for the configured scale factor.",
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter,
+    )
+    parser.add_argument(
+        "--reference",
+        default="duckdb",
+        help="Solution that computes the reference answers",
+        metavar="<solution>",
+    )
+    args = parser.parse_args()
+
+    if settings.scale_factor == 1:
+        print("Official answers exist for scale factor 1, nothing to generate.")
+        sys.exit(1)
+
+    path = settings.answers_dir
+    shutil.rmtree(path, ignore_errors=True)
+
+    env = os.environ | {
+        "RUN_IO_TYPE": "parquet",
+        "RUN_WRITE_ANSWERS": "1",
+        "RUN_CHECK_RESULTS": "0",
+        "RUN_LOG_TIMINGS": "0",
+        "RUN_ITERATIONS": "1",
+    }
+    subprocess.run([sys.executable, "-m", f"queries.{args.reference}"], env=env)
+
+    missing = [
+        i
+        for i in get_query_numbers(args.reference)
+        if not (path / f"q{i}.parquet").exists()
+    ]
+    if missing:
+        print(f"No answers were generated for queries {missing}.")
+        sys.exit(1)
+
+    # The manifest is written last, so incomplete answers are never used
+    manifest = {
+        "manifest_hash": get_manifest_hash(),
+        "scale_factor": settings.scale_factor,
+        "solution": args.reference,
+        "version": version(PACKAGE_NAMES.get(args.reference, args.reference)),
+    }
+    (path / "manifest.json").write_text(json.dumps(manifest, indent=2))
+    print(f"Reference answers written to {path}")
+
+
+if __name__ == "__main__":
+    main()
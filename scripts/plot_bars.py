@@ -27,9 +27,18 @@ settings = Settings()
 COLORS = {
     "polars": "#0075FF",
     "polars-eager": "#00B4D8",
+    "polars-sql": "#3D5AFE",
     "duckdb": "#80B9C8",
+    "duckdb-persistent": "#5E9AAA",
+    "duckdb-polars": "#4D8FE0",
+    "duckdb-arrow": "#A3CFDA",
     "pyspark": "#C29470",
+    "pyspark-no-arrow": "#D9B89C",
+    "pyspark-local-cluster": "#A8764F",
+    "pyspark-session": "#B3825C",
     "dask": "#77D487",
+    "dask-processes": "#9BE0A6",
+    "dask-distributed": "#5CB86B",
     "pandas": "#2B8C5D",
     "modin": "#50B05F",
 }
@@ -37,11 +46,20 @@ COLORS = {
 SOLUTION_NAME_MAP = {
     "polars": "Polars",
     "polars-eager": "Polars - eager",
+    "polars-sql": "Polars - SQL",
     "duckdb": "DuckDB",
+    "duckdb-persistent": "DuckDB - persistent",
+    "duckdb-polars": "DuckDB - on Polars",
+    "duckdb-arrow": "DuckDB - on Arrow",
     "pandas": "pandas",
     "dask": "Dask",
+    "dask-processes": "Dask - processes",
+    "dask-distributed": "Dask - distributed",
     "modin": "Modin",
     "pyspark": "PySpark",
+    "pyspark-no-arrow": "PySpark - no Arrow",
+    "pyspark-local-cluster": "PySpark - local cluster",
+    "pyspark-session": "PySpark - shared session",
 }
 
 Y_LIMIT_MAP = {
@@ -49,6 +67,8 @@ Y_LIMIT_MAP = {
     "parquet": 20.0,
     "csv": 25.0,
     "feather": 20.0,
+    "mmap": 15.0,
+    "shm": 15.0,
 }
 LIMIT = settings.plot.y_limit or Y_LIMIT_MAP[settings.run.io_type]
 
@@ -62,8 +82,8 @@ def main() -> None:
 def prep_data() -> pl.DataFrame:
     lf = pl.scan_csv(settings.paths.timings / settings.paths.timings_filename)
 
-    # Scale factor not used at the moment
-    lf = lf.drop("scale_factor")
+    # Select timings with the right scale factor
+    lf = lf.filter(pl.col("scale_factor") == settings.scale_factor).drop("scale_factor")
 
     # Select timings with the right IO type
     lf = lf.filter(pl.col("io_type") == settings.run.io_type).drop("io_type")
@@ -147,12 +167,20 @@ def plot(df: pl.DataFrame) -> Figure:
 
 
 def get_title(io_type: IoType) -> str:
-    if io_type == "skip":
-        title = "Runtime excluding data read from disk"
+    file_type_map = {
+        "skip": None,
+        "parquet": "Parquet",
+        "csv": "CSV",
+        "feather": "Feather",
+        "mmap": "memory-mapped Arrow IPC",
+        "shm": "shared-memory catalog",
+    }
+    if settings.run.include_io:
+        title = "Runtime including data read from disk"
     else:
-        file_type_map = {"parquet": "Parquet", "csv": "CSV", "feather": "Feather"}
-        file_type_formatted = file_type_map[io_type]
-        title = f"Runtime including data read from disk ({file_type_formatted})"
+        title = "Runtime excluding data read from disk"
+    if file_type_map[io_type] is not None:
+        title += f" ({file_type_map[io_type]})"
 
     subtitle = "(lower is better)"
 
@@ -0,0 +1,81 @@
+"""Measure how much each optimization of the Polars query optimizer contributes.
+
+Every query is run once with all optimizations and once with each optimization
+turned off. The slowdown relative to the fully optimized run is reported per query
+and optimization.
+
+To use this script, run:
+
+```shell
+.venv/bin/python -m scripts.polars_optimizer_ablation
+```
+"""
+
+from __future__ import annotations
+
+import argparse
+from typing import get_args
+
+import polars as pl
+
+from scripts.sweep import run_grid
+from settings import Run, Settings
+
+settings = Settings()
+
+OPTIMIZATIONS = [
+    o
+    for o in get_args(Run.model_fields["polars_disabled_optimization"].annotation)
+    if o != "none"
+]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Find the slowdown of each query without each optimization.",
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter,
+    )
+    parser.add_argument(
+        "--optimizations",
+        default=",".join(OPTIMIZATIONS),
+        help="Optimizations to turn off one at a time",
+        metavar="<list of optimizations>",
+    )
+    args = parser.parse_args()
+
+    grid = {
+        "RUN_POLARS_DISABLED_OPTIMIZATION": ["none", *args.optimizations.split(",")]
+    }
+
+    output_dir = settings.paths.timings / "polars-optimizer-ablation"
+    timings = run_grid("polars", grid, output_dir)
+
+    per_config = timings.group_by(
+        "run_polars_disabled_optimization", "query_number"
+    ).agg(pl.col("duration[s]").min())
+    baseline = per_config.filter(
+        pl.col("run_polars_disabled_optimization") == "none"
+    ).select("query_number", pl.col("duration[s]").alias("optimized[s]"))
+
+    # Queries that fail without an optimization are missing from the timings
+    slowdown = (
+        per_config.filter(pl.col("run_polars_disabled_optimization") != "none")
+        .join(baseline, on="query_number", how="left")
+        .with_columns(
+            (pl.col("duration[s]") / pl.col("optimized[s]")).alias("slowdown")
+        )
+        .rename({"run_polars_disabled_optimization": "optimization"})
+        .sort("query_number", "optimization")
+    )
+    slowdown.write_csv(output_dir / "slowdown.csv")
+
+    with pl.Config(tbl_rows=100, tbl_cols=-1, tbl_width_chars=200, float_precision=2):
+        print(
+            slowdown.pivot(
+                "optimization", index="query_number", values="slowdown"
+            ).sort("query_number")
+        )
+
+
+if __name__ == "__main__":
+    main()
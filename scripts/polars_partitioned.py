@@ -0,0 +1,316 @@
+"""Run Polars queries as partitioned plans over local worker processes.
+
+A stand-in for distributed execution that runs offline, without a compute service.
+The coordinator splits the partitions of lineitem and orders across N worker
+processes. Each worker runs the query on its partitions, which scans, filters,
+joins and partially aggregates them, and the coordinator merges the partial
+results into the final result.
+
+Lineitem and orders are both partitioned on the order key, so joins on it stay
+within a partition; the other tables are read whole by every worker. Only
+queries whose partial results can be merged are supported: aggregations that
+can be summed, and top-k results of groups that contain the order key.
+
+With `num_batches` set, the partitions are the batches written by
+`scripts/prepare_data`. Otherwise the tables are split into order key ranges,
+which the Parquet statistics prune to the matching row groups.
+
+Every query is run with 1 worker and with each given number of workers. The
+speedup over a single worker is reported per query.
+
+To use this script, run:
+
+```shell
+.venv/bin/python -m scripts.polars_partitioned --workers 1,2,4
+```
+"""
+
+from __future__ import annotations
+
+import argparse
+import multiprocessing
+import os
+import time
+from importlib import import_module
+from typing import TYPE_CHECKING
+
+import polars as pl
+
+from queries.common_utils import check_query_result_pl
+from settings import Settings
+
+if TYPE_CHECKING:
+    from collections.abc import Callable
+    from multiprocessing.synchronize import Barrier
+
+settings = Settings()
+
+TABLE_NAMES = [
+    "customer",
+    "lineitem",
+    "nation",
+    "orders",
+    "part",
+    "partsupp",
+    "region",
+    "supplier",
+]
+
+# Tables that are partitioned on the order key, all others are read whole
+PARTITION_KEYS = {"lineitem": "l_orderkey", "orders": "o_orderkey"}
+
+
+def _sum_by(
+    *keys: str,
+    sort_by: list[str] | None = None,
+    descending: bool | list[bool] = False,
+    decimals: int | None = None,
+) -> Callable[[pl.DataFrame], pl.DataFrame]:
+    """Merge partial results by summing them per group, sorted by the keys."""
+
+    def merge(df: pl.DataFrame) -> pl.DataFrame:
+        values = [pl.col(c).sum() for c in df.columns if c not in keys]
+        if decimals is not None:
+            values = [v.round(decimals) for v in values]
+        if not keys:
+            return df.select(values)
+        return (
+            df.group_by(keys).agg(values).sort(sort_by or keys, descending=descending)
+        )
+
+    return merge
+
+
+def _top(
+    n: int, by: list[str], descending: list[bool]
+) -> Callable[[pl.DataFrame], pl.DataFrame]:
+    """Merge partial top-k results of groups that never span partitions."""
+    return lambda df: df.sort(by, descending=descending).head(n)
+
+
+def _merge_q1(df: pl.DataFrame) -> pl.DataFrame:
+    keys = ["l_returnflag", "l_linestatus"]
+    count = pl.col("count_order")
+    sums = ["sum_qty", "sum_base_price", "sum_disc_price", "sum_charge"]
+    means = ["avg_qty", "avg_price", "avg_disc"]
+    return (
+        df.group_by(keys)
+        .agg(
+            pl.col(*sums).sum(),
+            # Means of the partitions weighted by their number of rows
+            *[((pl.col(c) * count).sum() / count.sum()).alias(c) for c in means],
+            count.sum(),
+        )
+        .select(df.columns)
+        .sort(keys)
+    )
+
+
+# How the partial results of each supported query are merged
+MERGES: dict[int, Callable[[pl.DataFrame], pl.DataFrame]] = {
+    1: _merge_q1,
+    3: _top(10, ["revenue", "o_orderdate"], [True, False]),
+    4: _sum_by("o_orderpriority"),
+    5: _sum_by("n_name", sort_by=["revenue"], descending=True),
+    6: _sum_by(),
+    7: _sum_by("supp_nation", "cust_nation", "l_year"),
+    9: _sum_by("nation", "o_year", descending=[False, True], decimals=2),
+    12: _sum_by("l_shipmode"),
+    18: _top(100, ["o_totalprice", "o_orderdat"], [True, False]),
+    19: _sum_by(decimals=2),
+}
+
+
+def get_partitions(n_partitions: int) -> tuple[list[int], int | None]:
+    """Return the partitions and the width of their order key ranges.
+
+    Batches written by `scripts/prepare_data` already are partitions, so no order
+    key ranges are needed for them.
+    """
+    if settings.num_batches is not None:
+        path = settings.dataset_base_dir / str(settings.num_batches) / "orders"
+        # Files are written to `<batch>_<file>` directories
+        batches = {int(p.name.split("_")[0]) for p in path.iterdir()}
+        return sorted(batches), None
+
+    max_orderkey = (
+        pl.scan_parquet(settings.dataset_base_dir / "orders.parquet")
+        .select(pl.max("o_orderkey"))
+        .collect()
+        .item()
+    )
+    return list(range(n_partitions)), max_orderkey // n_partitions + 1
+
+
+def _scan_partitioned(
+    table_name: str, partitions: list[int], step: int | None
+) -> pl.LazyFrame:
+    if settings.num_batches is not None:
+        path = settings.dataset_base_dir / str(settings.num_batches) / table_name
+        if table_name not in PARTITION_KEYS:
+            return pl.scan_parquet(path / "*" / "part.parquet")
+        return pl.scan_parquet([path / f"{p}_*" / "part.parquet" for p in partitions])
+
+    lf = pl.scan_parquet(settings.dataset_base_dir / f"{table_name}.parquet")
+    if table_name not in PARTITION_KEYS:
+        return lf
+
+    # The partitions of a worker are contiguous, so they form a single key range
+    assert step is not None
+    return lf.filter(
+        pl.col(PARTITION_KEYS[table_name]).is_between(
+            partitions[0] * step, (partitions[-1] + 1) * step, closed="left"
+        )
+    )
+
+
+def _run_partial(
+    query_number: int, partitions: list[int], step: int | None
+) -> pl.DataFrame:
+    """Run the query on the given partitions in a worker process."""
+    tables = {name: _scan_partitioned(name, partitions, step) for name in TABLE_NAMES}
+    query = import_module(f"queries.polars.q{query_number}")
+    result: pl.DataFrame = query.q(**tables).collect()
+    return result
+
+
+def _init_worker(query_numbers: list[int], ready: Barrier) -> None:
+    """Import the queries and start the Polars thread pool before any is timed."""
+    for query_number in query_numbers:
+        import_module(f"queries.polars.q{query_number}")
+    pl.LazyFrame({"a": [1]}).select(pl.sum("a")).collect()
+    ready.wait()
+
+
+def split_partitions(partitions: list[int], n_workers: int) -> list[list[int]]:
+    """Split the partitions into contiguous blocks, one per worker."""
+    n = len(partitions)
+    return [
+        partitions[i * n // n_workers : (i + 1) * n // n_workers]
+        for i in range(n_workers)
+    ]
+
+
+def run_partitioned(
+    query_numbers: list[int], n_workers: int, n_partitions: int, threads: int
+) -> pl.DataFrame:
+    """Run the queries with the given number of workers and return the timings."""
+    partitions, step = get_partitions(n_partitions)
+    if n_workers > len(partitions):
+        msg = f"cannot split {len(partitions)} partitions across {n_workers} workers"
+        raise ValueError(msg)
+    blocks = split_partitions(partitions, n_workers)
+
+    # Spawned workers read the thread count when they import Polars
+    os.environ["POLARS_MAX_THREADS"] = str(threads)
+    context = multiprocessing.get_context("spawn")
+    rows = []
+    # The workers are started and warmed up once, before the first query is timed
+    ready = context.Barrier(n_workers + 1)
+    with context.Pool(n_workers, _init_worker, (query_numbers, ready)) as pool:
+        ready.wait()
+        for query_number in query_numbers:
+            durations = []
+            for _ in range(settings.run.iterations):
+                start = time.perf_counter()
+                partials = pool.starmap(
+                    _run_partial,
+                    [(query_number, block, step) for block in blocks],
+                )
+                result = MERGES[query_number](pl.concat(partials))
+                durations.append(time.perf_counter() - start)
+
+            if settings.run.check_results:
+                check_query_result_pl(result, query_number)
+            if settings.run.show_results:
+                print(result)
+
+            print(
+                f"Query {query_number} with {n_workers} workers: {min(durations):.3f} s"
+            )
+            rows.append(
+                {
+                    "query_number": query_number,
+                    "workers": n_workers,
+                    "duration[s]": min(durations),
+                }
+            )
+    del os.environ["POLARS_MAX_THREADS"]
+
+    return pl.DataFrame(rows)
+
+
+def compute_scaling(timings: pl.DataFrame) -> pl.DataFrame:
+    """Compute the speedup over a single worker and the parallel efficiency."""
+    return (
+        timings.sort("workers")
+        .with_columns(
+            (pl.col("duration[s]").first() / pl.col("duration[s]"))
+            .over("query_number")
+            .alias("speedup")
+        )
+        .with_columns((pl.col("speedup") / pl.col("workers")).alias("efficiency"))
+        .sort("query_number", "workers")
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Find the speedup of partitioned execution over worker processes.",
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter,
+    )
+    parser.add_argument(
+        "--workers",
+        default="1,2,4",
+        help="Numbers of worker processes to run each query with",
+        metavar="<list of integers>",
+    )
+    parser.add_argument(
+        "--queries",
+        default=",".join(str(q) for q in MERGES),
+        help="Queries to run, only those with a merge are supported",
+        metavar="<list of integers>",
+    )
+    parser.add_argument(
+        "--partitions",
+        type=int,
+        default=16,
+        help="Order key ranges to split the tables into, unless num_batches is set",
+        metavar="<integer>",
+    )
+    parser.add_argument(
+        "--threads",
+        type=int,
+        default=None,
+        help="Polars threads per worker, the available cores split evenly if unset",
+        metavar="<integer>",
+    )
+    args = parser.parse_args()
+
+    query_numbers = [int(q) for q in args.queries.split(",")]
+    unsupported = set(query_numbers) - set(MERGES)
+    if unsupported:
+        msg = f"queries {sorted(unsupported)} cannot be merged from partitions"
+        raise ValueError(msg)
+
+    # A single worker is always run as the baseline of the speedup
+    workers = sorted({1, *(int(w) for w in args.workers.split(","))})
+    n_cores = len(os.sched_getaffinity(0))
+    timings = pl.concat(
+        run_partitioned(
+            query_numbers, n, args.partitions, args.threads or max(n_cores // n, 1)
+        )
+        for n in workers
+    )
+    scaling = compute_scaling(timings)
+
+    output_dir = settings.paths.timings / "polars-partitioned"
+    output_dir.mkdir(parents=True, exist_ok=True)
+    scaling.write_csv(output_dir / "scaling.csv")
+
+    with pl.Config(tbl_rows=100, float_precision=2):
+        print(scaling.pivot("workers", index="query_number", values="speedup"))
+
+
+if __name__ == "__main__":
+    main()
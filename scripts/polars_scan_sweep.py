@@ -0,0 +1,92 @@
+"""Run the Polars queries across a grid of Parquet scan options.
+
+To use this script, run:
+
+```shell
+.venv/bin/python -m scripts.polars_scan_sweep --parallel auto,row_groups
+```
+
+With `RUN_IO_TYPE=skip`, only the `--skip-rechunk` values are swept.
+"""
+
+from __future__ import annotations
+
+import argparse
+
+import polars as pl
+
+from scripts.sweep import run_grid, summarize_grid
+from settings import Settings
+
+settings = Settings()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Find the fastest Parquet scan options per query and overall.",
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter,
+    )
+    parser.add_argument(
+        "--parallel",
+        default="auto,columns,row_groups,prefiltered",
+        help="Values for the `parallel` strategy of `pl.scan_parquet`",
+        metavar="<list of strategies>",
+    )
+    parser.add_argument(
+        "--low-memory",
+        default="false,true",
+        help="Values for the `low_memory` option of `pl.scan_parquet`",
+        metavar="<list of booleans>",
+    )
+    parser.add_argument(
+        "--use-statistics",
+        default="true,false",
+        help="Values for the `use_statistics` option of `pl.scan_parquet`",
+        metavar="<list of booleans>",
+    )
+    parser.add_argument(
+        "--rechunk",
+        default="false,true",
+        help="Values for the `rechunk` option of `pl.scan_parquet`",
+        metavar="<list of booleans>",
+    )
+    parser.add_argument(
+        "--cache",
+        default="true",
+        help="Values for the `cache` option of `pl.scan_parquet`",
+        metavar="<list of booleans>",
+    )
+    parser.add_argument(
+        "--skip-rechunk",
+        default="true,false",
+        help="Values for the `rechunk` option of `pl.read_parquet` with io type skip",
+        metavar="<list of booleans>",
+    )
+    args = parser.parse_args()
+
+    if settings.run.io_type == "skip":
+        grid = {"RUN_POLARS_SKIP_RECHUNK": args.skip_rechunk.split(",")}
+    else:
+        grid = {
+            "RUN_POLARS_SCAN_PARALLEL": args.parallel.split(","),
+            "RUN_POLARS_SCAN_LOW_MEMORY": args.low_memory.split(","),
+            "RUN_POLARS_SCAN_USE_STATISTICS": args.use_statistics.split(","),
+            "RUN_POLARS_SCAN_RECHUNK": args.rechunk.split(","),
+            "RUN_POLARS_SCAN_CACHE": args.cache.split(","),
+        }
+    setting_columns = [k.lower() for k in grid]
+
+    output_dir = settings.paths.timings / f"polars-scan-sweep-{settings.run.io_type}"
+    timings = run_grid("polars", grid, output_dir)
+    fastest_per_query, overall = summarize_grid(timings, setting_columns)
+
+    fastest_per_query.write_csv(output_dir / "fastest-per-query.csv")
+    overall.write_csv(output_dir / "overall.csv")
+
+    with pl.Config(tbl_rows=100, tbl_cols=-1, tbl_width_chars=200):
+        print(fastest_per_query)
+        print(overall)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,159 @@
+"""Measure how the queries of each solution scale with the TPC-H scale factor.
+
+Missing data tables are generated with `make data-tables`, in the tables path of
+the settings. Every solution is run at each scale factor with CPU sampling
+enabled, to also record the peak memory. The growth exponents of time and memory
+are fitted per query, assuming they grow as `scale_factor ** exponent`. An
+exponent above 1 means super-linear growth.
+
+To use this script, run:
+
+```shell
+.venv/bin/python -m scripts.scale_sweep --scale-factors 0.1,1,10
+```
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import subprocess
+
+import plotly.express as px
+import polars as pl
+
+from scripts.sweep import run_grid
+from settings import Settings
+
+settings = Settings()
+
+
+def generate_tables(scale_factor: str) -> None:
+    """Generate the data tables of the given scale factor if they do not exist."""
+    path = settings.paths.tables / f"scale-{scale_factor}"
+    if path.exists():
+        return
+    subprocess.run(
+        ["make", "data-tables", f"TABLES_DIR={settings.paths.tables}"],
+        env=os.environ | {"SCALE_FACTOR": scale_factor},
+        check=True,
+    )
+
+
+def run_scale_factor(library_name: str, scale_factor: str) -> pl.DataFrame:
+    """Run all queries of a solution at a scale factor, with their peak memory."""
+    output_dir = settings.paths.timings / "scale-sweep" / library_name / scale_factor
+    grid = {"SCALE_FACTOR": [scale_factor], "RUN_CPU_SAMPLING": ["1"]}
+    timings = run_grid(library_name, grid, output_dir)
+
+    memory = (
+        pl.read_csv(output_dir / "metrics-0.csv")
+        .filter(pl.col("metric") == "peak_memory[bytes]")
+        .group_by("solution", "query_number")
+        .agg(pl.col("value").max().alias("peak_memory[bytes]"))
+    )
+    return timings.join(memory, on=["solution", "query_number"], how="left").select(
+        "solution",
+        "query_number",
+        "scale_factor",
+        "duration[s]",
+        "peak_memory[bytes]",
+    )
+
+
+def _exponent(column: str) -> pl.Expr:
+    """Least-squares slope of the column against the scale factor on log-log axes."""
+    x = pl.col("scale_factor").log()
+    y = pl.col(column).log()
+    return ((x - x.mean()) * (y - y.mean())).sum() / ((x - x.mean()) ** 2).sum()
+
+
+def fit_exponents(results: pl.DataFrame) -> pl.DataFrame:
+    """Fit the growth exponents of time and memory per solution and query."""
+    return (
+        results.group_by("solution", "query_number", "scale_factor")
+        .agg(pl.col("duration[s]").min(), pl.col("peak_memory[bytes]").max())
+        .group_by("solution", "query_number")
+        .agg(
+            _exponent("duration[s]").alias("time_exponent"),
+            _exponent("peak_memory[bytes]").alias("memory_exponent"),
+            pl.len().alias("n_scale_factors"),
+        )
+        .sort("solution", "query_number")
+    )
+
+
+def plot_scaling(results: pl.DataFrame, solution: str) -> None:
+    """Plot the time and memory per query against the scale factor, log-log."""
+    df = (
+        results.filter(pl.col("solution") == solution)
+        .with_columns(pl.format("Q{}", "query_number").alias("query"))
+        .unpivot(
+            ["duration[s]", "peak_memory[bytes]"],
+            index=["query", "scale_factor"],
+            variable_name="metric",
+        )
+        .sort("scale_factor")
+    )
+    fig = px.line(
+        df,
+        x="scale_factor",
+        y="value",
+        color="query",
+        facet_col="metric",
+        markers=True,
+        log_x=True,
+        log_y=True,
+        template="plotly_white",
+        title=f"Scale factor scaling of {solution}",
+    )
+    fig.update_yaxes(matches=None, showticklabels=True)
+
+    path = settings.paths.plots
+    path.mkdir(parents=True, exist_ok=True)
+    fig.write_html(path / f"scale-sweep-{solution}.html")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Fit the growth of time and memory with the scale factor per query.",
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter,
+    )
+    parser.add_argument(
+        "--solutions",
+        default="polars,duckdb",
+        help="Solutions to run",
+        metavar="<list of solutions>",
+    )
+    parser.add_argument(
+        "--scale-factors",
+        default="0.1,1,10",
+        help="Scale factors to run",
+        metavar="<list of numbers>",
+    )
+    args = parser.parse_args()
+
+    # Scale factors are formatted as floats, as in the data table directories
+    scale_factors = [str(float(sf)) for sf in args.scale_factors.split(",")]
+    for scale_factor in scale_factors:
+        generate_tables(scale_factor)
+
+    results = pl.concat(
+        run_scale_factor(library_name, scale_factor)
+        for library_name in args.solutions.split(",")
+        for scale_factor in scale_factors
+    )
+    exponents = fit_exponents(results)
+
+    output_dir = settings.paths.timings / "scale-sweep"
+    results.write_csv(output_dir / "results.csv")
+    exponents.write_csv(output_dir / "exponents.csv")
+    for solution in results.get_column("solution").unique(maintain_order=True):
+        plot_scaling(results, solution)
+
+    with pl.Config(tbl_rows=100, float_precision=2):
+        print(exponents)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""Run the PySpark queries across a grid of Spark SQL configurations.
+
+To use this script, run:
+
+```shell
+.venv/bin/python -m scripts.spark_config_sweep --shuffle-partitions 8,200
+```
+"""
+
+from __future__ import annotations
+
+import argparse
+
+import polars as pl
+
+from scripts.sweep import run_grid, summarize_grid
+from settings import Settings
+
+settings = Settings()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Find the fastest Spark SQL configuration per query and overall.",
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter,
+    )
+    parser.add_argument(
+        "--shuffle-partitions",
+        default="8,200",
+        help="Values for spark.sql.shuffle.partitions",
+        metavar="<list of integers>",
+    )
+    parser.add_argument(
+        "--adaptive",
+        default="true,false",
+        help="Values for spark.sql.adaptive.enabled",
+        metavar="<list of booleans>",
+    )
+    parser.add_argument(
+        "--skew-join",
+        default="true",
+        help="Values for spark.sql.adaptive.skewJoin.enabled",
+        metavar="<list of booleans>",
+    )
+    parser.add_argument(
+        "--broadcast-threshold",
+        default="10MB,-1",
+        help="Values for spark.sql.autoBroadcastJoinThreshold",
+        metavar="<list of sizes>",
+    )
+    parser.add_argument(
+        "--codegen",
+        default="true",
+        help="Values for spark.sql.codegen.wholeStage",
+        metavar="<list of booleans>",
+    )
+    args = parser.parse_args()
+
+    grid = {
+        "RUN_SPARK_SHUFFLE_PARTITIONS": args.shuffle_partitions.split(","),
+        "RUN_SPARK_ADAPTIVE": args.adaptive.split(","),
+        "RUN_SPARK_SKEW_JOIN": args.skew_join.split(","),
+        "RUN_SPARK_BROADCAST_THRESHOLD": args.broadcast_threshold.split(","),
+        "RUN_SPARK_CODEGEN": args.codegen.split(","),
+    }
+    setting_columns = [k.lower() for k in grid]
+
+    output_dir = settings.paths.timings / "spark-config-sweep"
+    timings = run_grid("pyspark", grid, output_dir)
+    fastest_per_query, overall = summarize_grid(timings, setting_columns)
+
+    fastest_per_query.write_csv(output_dir / "fastest-per-query.csv")
+    overall.write_csv(output_dir / "overall.csv")
+
+    with pl.Config(tbl_rows=100, tbl_cols=-1, tbl_width_chars=200):
+        print(fastest_per_query)
+        print(overall)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+"""Helpers for running a solution across a grid of run settings."""
+
+from __future__ import annotations
+
+import itertools
+import os
+import subprocess
+import sys
+from functools import partial
+from typing import TYPE_CHECKING
+
+import polars as pl
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+
+def _set_affinity(cpus: int) -> None:
+    available = sorted(os.sched_getaffinity(0))
+    os.sched_setaffinity(0, available[:cpus])
+
+
+def run_grid(
+    library_name: str,
+    grid: dict[str, list[str]],
+    output_dir: Path,
+    cpus: int | None = None,
+) -> pl.DataFrame:
+    """Run all queries of a solution once for every combination of settings.
+
+    Parameters
+    ----------
+    library_name
+        The solution to run, e.g. `pyspark`.
+    grid
+        Mapping of environment variables, e.g. `RUN_SPARK_ADAPTIVE`, to the values
+        to try.
+    output_dir
+        Directory to write the timings and metrics of each configuration to.
+    cpus
+        Restrict the runs to this many CPUs through the CPU affinity of the
+        process, which is inherited by its threads and child processes. Only
+        available on Linux.
+
+    Returns
+    -------
+    The timings of all configurations, with a `config_id` column and a column per
+    setting in the grid.
+
+    Raises
+    ------
+    ValueError
+        If more CPUs are requested than are available to the process.
+    RuntimeError
+        If no configuration produced any timings.
+    """
+    if cpus is not None:
+        n_available = len(os.sched_getaffinity(0))
+        if cpus > n_available:
+            msg = f"cannot run on {cpus} CPUs, only {n_available} are available"
+            raise ValueError(msg)
+
+    output_dir.mkdir(parents=True, exist_ok=True)
+
+    timings = []
+    failed: dict[int, str] = {}
+    for config_id, values in enumerate(itertools.product(*grid.values())):
+        config = dict(zip(grid, values, strict=True))
+        print(f"Configuration {config_id}: {config}")
+
+        timings_path = output_dir / f"timings-{config_id}.csv"
+        timings_path.unlink(missing_ok=True)
+        metrics_path = output_dir / f"metrics-{config_id}.csv"
+        metrics_path.unlink(missing_ok=True)
+
+        env = os.environ | config
+        env["RUN_LOG_TIMINGS"] = "1"
+        env["PATH_TIMINGS"] = str(output_dir)
+        env["PATH_TIMINGS_FILENAME"] = timings_path.name
+        env["PATH_METRICS_FILENAME"] = metrics_path.name
+        process = subprocess.run(
+            [sys.executable, "-m", f"queries.{library_name}"],
+            env=env,
+            preexec_fn=None if cpus is None else partial(_set_affinity, cpus),
+        )
+
+        if process.returncode != 0:
+            failed[config_id] = f"exited with code {process.returncode}"
+            print(f"Configuration {config_id} {failed[config_id]}: {config}")
+        if not timings_path.exists():
+            failed.setdefault(config_id, "did not produce any timings")
+            print(f"Configuration {config_id} did not produce any timings")
+            continue
+
+        timings.append(
+            pl.read_csv(timings_path).with_columns(
+                pl.lit(config_id).alias("config_id"),
+                *(pl.lit(v).alias(k.lower()) for k, v in config.items()),
+            )
+        )
+
+    for config_id, reason in failed.items():
+        print(f"Configuration {config_id} failed, it {reason}")
+    if not timings:
+        msg = f"none of the {len(failed)} configurations produced any timings"
+        raise RuntimeError(msg)
+
+    return pl.concat(timings)
+
+
+def summarize_grid(
+    timings: pl.DataFrame, setting_columns: list[str]
+) -> tuple[pl.DataFrame, pl.DataFrame]:
+    """Find the fastest configuration per query and overall.
+
+    The fastest iteration of each query is used. Only configurations that
+    completed every query are considered for the overall ranking.
+
+    Returns
+    -------
+    The fastest configuration per query, and all configurations ranked by their
+    total duration.
+    """
+    per_config = timings.group_by("config_id", *setting_columns, "query_number").agg(
+        pl.col("duration[s]").min()
+    )
+
+    fastest_per_query = (
+        per_config.sort("duration[s]")
+        .group_by("query_number", maintain_order=True)
+        .first()
+        .sort("query_number")
+    )
+
+    n_queries = per_config.get_column("query_number").n_unique()
+    overall = (
+        per_config.group_by("config_id", *setting_columns)
+        .agg(pl.sum("duration[s]"), pl.len().alias("n_queries"))
+        .filter(pl.col("n_queries") == n_queries)
+        .sort("duration[s]")
+    )
+
+    return fastest_per_query, overall
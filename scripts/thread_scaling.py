@@ -0,0 +1,150 @@
+"""Measure how the queries of each solution scale with the number of cores.
+
+Every solution is run with 1, 2, 4, ... cores, up to the number of available cores.
+The cores are limited both through the engine settings and the CPU affinity of the
+process. The speedup over a single core and the parallel efficiency, the speedup
+per core, are reported per query.
+
+To use this script, run:
+
+```shell
+.venv/bin/python -m scripts.thread_scaling --solutions polars,duckdb
+```
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+
+import plotly.express as px
+import polars as pl
+
+from scripts.sweep import run_grid
+from settings import Settings
+
+settings = Settings()
+
+# Environment variables that limit the number of threads of each engine
+THREAD_SETTINGS = {
+    "polars": ["POLARS_MAX_THREADS"],
+    "duckdb": ["RUN_DUCKDB_THREADS"],
+    "pandas": [],
+    "pyspark": ["RUN_SPARK_CORES"],
+    "dask": ["RUN_DASK_N_WORKERS"],
+    "modin": ["MODIN_CPUS"],
+}
+
+
+def _default_cores() -> str:
+    n_cores = len(os.sched_getaffinity(0))
+    cores = [2**i for i in range(n_cores.bit_length()) if 2**i < n_cores]
+    return ",".join(str(c) for c in [*cores, n_cores])
+
+
+def run_scaling(library_name: str, cores: list[int]) -> pl.DataFrame:
+    """Run all queries of a solution with each number of cores."""
+    timings = []
+    for n in cores:
+        grid = {key: [str(n)] for key in THREAD_SETTINGS[library_name]}
+        output_dir = settings.paths.timings / "thread-scaling" / library_name / str(n)
+        timings.append(
+            run_grid(library_name, grid, output_dir, cpus=n).select(
+                "solution",
+                "query_number",
+                pl.lit(n).alias("cores"),
+                "duration[s]",
+            )
+        )
+    return pl.concat(timings)
+
+
+def compute_scaling(timings: pl.DataFrame) -> pl.DataFrame:
+    """Compute the speedup over the fewest cores and the parallel efficiency."""
+    return (
+        timings.group_by("solution", "query_number", "cores")
+        .agg(pl.col("duration[s]").min())
+        .sort("cores")
+        .with_columns(
+            (pl.col("duration[s]").first() / pl.col("duration[s]"))
+            .over("solution", "query_number")
+            .alias("speedup")
+        )
+        .with_columns(
+            (pl.col("speedup") * pl.col("cores").min() / pl.col("cores")).alias(
+                "efficiency"
+            )
+        )
+        .sort("solution", "query_number", "cores")
+    )
+
+
+def plot_scaling(scaling: pl.DataFrame, solution: str) -> None:
+    """Plot the speedup and parallel efficiency per query against the cores."""
+    df = (
+        scaling.filter(pl.col("solution") == solution)
+        .with_columns(pl.format("Q{}", "query_number").alias("query"))
+        .unpivot(
+            ["speedup", "efficiency"],
+            index=["query", "cores"],
+            variable_name="metric",
+        )
+    )
+    fig = px.line(
+        df,
+        x="cores",
+        y="value",
+        color="query",
+        facet_col="metric",
+        markers=True,
+        log_x=True,
+        template="plotly_white",
+        title=f"Thread scaling of {solution}",
+    )
+    fig.update_yaxes(matches=None, showticklabels=True)
+
+    path = settings.paths.plots
+    path.mkdir(parents=True, exist_ok=True)
+    fig.write_html(path / f"thread-scaling-{solution}.html")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Find the speedup and parallel efficiency per query and core count.",
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter,
+    )
+    parser.add_argument(
+        "--solutions",
+        default=",".join(THREAD_SETTINGS),
+        help="Solutions to run",
+        metavar="<list of solutions>",
+    )
+    parser.add_argument(
+        "--cores",
+        default=_default_cores(),
+        help="Numbers of cores to run each solution with",
+        metavar="<list of integers>",
+    )
+    args = parser.parse_args()
+
+    cores = sorted(int(c) for c in args.cores.split(","))
+    timings = pl.concat(
+        run_scaling(library_name, cores) for library_name in args.solutions.split(",")
+    )
+    scaling = compute_scaling(timings)
+
+    output_dir = settings.paths.timings / "thread-scaling"
+    scaling.write_csv(output_dir / "scaling.csv")
+    for solution in scaling.get_column("solution").unique(maintain_order=True):
+        plot_scaling(scaling, solution)
+
+    with pl.Config(tbl_rows=100, float_precision=2):
+        print(
+            scaling.pivot(
+                "cores", index=["solution", "query_number"], values="efficiency"
+            )
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -4,7 +4,7 @@ from typing import Literal, TypeAlias
 from pydantic import computed_field
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
-IoType: TypeAlias = Literal["skip", "parquet", "feather", "csv"]
+IoType: TypeAlias = Literal["skip", "parquet", "feather", "csv", "mmap", "shm"]
 
 
 # Set via PATH_<NAME>
@@ -14,6 +14,10 @@ class Paths(BaseSettings):
 
     timings: Path = Path("output/run")
     timings_filename: str = "timings.csv"
+    metrics_filename: str = "metrics.csv"
+    operators_filename: str = "operators.csv"
+    cpu_samples_filename: str = "cpu_samples.csv"
+    profiles_dirname: str = "profiles"  # Sampling profiles, within the timings
 
     plots: Path = Path("output/plot")
 
@@ -29,13 +33,57 @@ class Run(BaseSettings):
     iterations: int = 1
     log_timings: bool = False
     show_results: bool = False
-    check_results: bool = False  # Only available for SCALE_FACTOR=1
+    # Other scale factors than 1 need reference answers, see scripts/generate_answers
+    check_results: bool = False
+    check_rtol: float = 1e-5  # Relative tolerance when comparing float results
+    check_atol: float = 1e-8  # Absolute tolerance when comparing float results
+    write_answers: bool = False  # Write query results as reference answers
+    # Sample the CPU usage of the process tree while a query runs
+    cpu_sampling: bool = False
+    cpu_sampling_interval: float = 0.01  # In seconds
+    # Count hardware events such as cycles and cache misses with perf_event_open
+    perf_counters: bool = False
+    # Count the bytes read from storage, the tables are evicted from the page cache
+    # before every query run, so timings are of cold reads
+    io_accounting: bool = False
+    # Record a py-spy profile of every query run, timings include its overhead
+    sampling_profile: bool = False
+    sampling_profile_rate: int = 100  # Samples per second
+    sampling_profile_format: Literal["flamegraph", "speedscope"] = "speedscope"
+    # Shared memory budget of the table catalog for io_type shm, unlimited if None
+    catalog_memory_limit: int | None = None  # In bytes
 
     polars_show_plan: bool = False
     polars_eager: bool = False
     polars_old_streaming: bool = False
     polars_streaming: bool = False
     polars_cloud: bool = False
+    # Collect all queries together in batches through `pl.collect_all`
+    polars_batch: bool = False
+    polars_batch_size: int | None = None  # Queries per batch, all at once if None
+    polars_profile: bool = False  # Log per-operator timings from `LazyFrame.profile`
+    # Turn off a single optimization of the Polars query optimizer
+    polars_disabled_optimization: Literal[
+        "none",
+        "predicate_pushdown",
+        "projection_pushdown",
+        "slice_pushdown",
+        "comm_subplan_elim",
+        "comm_subexpr_elim",
+        "simplify_expression",
+        "cluster_with_columns",
+        "collapse_joins",
+    ] = "none"
+    # Options passed to `pl.scan_parquet`
+    polars_scan_parallel: Literal[
+        "auto", "columns", "row_groups", "prefiltered", "none"
+    ] = "auto"
+    polars_scan_low_memory: bool = False
+    polars_scan_use_statistics: bool = True
+    polars_scan_rechunk: bool = False
+    polars_scan_cache: bool = True
+    # Rechunk the tables read in memory for io_type skip
+    polars_skip_rechunk: bool = True
     polars_gpu: bool = False  # Use GPU engine?
     polars_gpu_device: int = 0  # The GPU device to run on for polars GPU
     # Which style of GPU memory resource to use
@@ -49,16 +97,47 @@ class Run(BaseSettings):
         "cuda", "cuda-pool", "managed", "managed-pool", "cuda-async"
     ] = "cuda-async"
 
+    duckdb_persistent: bool = False  # Query a database file instead of the tables
+    duckdb_threads: int | None = None  # Defaults to the number of CPU cores
+    duckdb_memory_limit: str | None = None  # e.g. "8GB", defaults to 80% of RAM
+    duckdb_temp_directory: Path | None = None  # Where to spill larger-than-memory data
+    # Which in-memory tables DuckDB queries with io_type=skip. Polars DataFrames and
+    # Arrow tables are scanned in place instead of being copied into DuckDB.
+    duckdb_in_memory_source: Literal["duckdb", "polars", "arrow"] = "duckdb"
+    duckdb_profile: bool = False  # Log per-operator timings from the JSON profile
+
     modin_memory: int = 8_000_000_000  # Tune as needed for optimal performance
 
+    dask_scheduler: Literal["threads", "processes", "distributed"] = "threads"
+    dask_n_workers: int | None = None  # Defaults to the number of CPU cores
+    dask_threads_per_worker: int | None = None  # Only for the distributed scheduler
+    dask_memory_limit: str = "auto"  # Per worker, only for the distributed scheduler
+    dask_local_directory: Path | None = None  # Spill directory of distributed workers
+
     spark_driver_memory: str = "2g"  # Tune as needed for optimal performance
     spark_executor_memory: str = "1g"  # Tune as needed for optimal performance
+    # Run a local cluster with this many executor processes instead of `local[*]`
+    spark_executors: int | None = None
+    spark_executor_cores: int = 1  # Cores per executor of the local cluster
+    spark_cores: int | None = None  # Cores of the local master, all cores if None
     spark_log_level: str = "ERROR"
+    spark_arrow: bool = True  # Use Arrow to collect results, else row-based
+    spark_shuffle_partitions: int = 200
+    spark_adaptive: bool = True  # Adaptive query execution
+    spark_skew_join: bool = True  # Only applies with adaptive query execution
+    spark_broadcast_threshold: str = "10MB"  # Set to -1 to disable broadcast joins
+    spark_codegen: bool = True  # Whole-stage code generation
+    spark_reuse_session: bool = False  # Run all queries in a single Spark session
+    spark_warmup_passes: int = 0  # Untimed passes over all queries to warm up the JVM
+    spark_event_log_dir: Path | None = None  # Write the Spark event log here if set
+    spark_stage_metrics: bool = False  # Log stage metrics of each query
 
     @computed_field  # type: ignore[prop-decorator]
     @property
     def include_io(self) -> bool:
-        return self.io_type != "skip"
+        # Memory-mapped tables and tables in the shared-memory catalog are already
+        # in memory, like with skip
+        return self.io_type not in ("skip", "mmap", "shm")
 
     model_config = SettingsConfigDict(
         env_prefix="run_", env_file=".env", extra="ignore"
@@ -88,4 +167,17 @@ class Settings(BaseSettings):
     def dataset_base_dir(self) -> Path:
         return self.paths.tables / f"scale-{self.scale_factor}"
 
+    @computed_field  # type: ignore[prop-decorator]
+    @property
+    def duckdb_database_path(self) -> Path:
+        return self.dataset_base_dir / "tpch.duckdb"
+
+    @computed_field  # type: ignore[prop-decorator]
+    @property
+    def answers_dir(self) -> Path:
+        # Official answers only exist for scale factor 1, others are generated
+        if self.scale_factor == 1:
+            return self.paths.answers
+        return self.dataset_base_dir / "answers"
+
     model_config = SettingsConfigDict(env_file=".env", extra="ignore")